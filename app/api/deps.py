@@ -1,8 +1,12 @@
-from collections.abc import Generator
+import secrets
+from collections.abc import AsyncGenerator, Generator
 from sqlmodel import Session
+from sqlmodel.ext.asyncio.session import AsyncSession
 from typing import Annotated
-from fastapi import Depends
+from fastapi import Depends, HTTPException, Request
 
+from core.admission import admission_controller
+from core.config import settings
 from core.db_client import DatabaseClient
 
 
@@ -14,4 +18,48 @@ def get_db() -> Generator[Session, None, None]:
         yield session
 
 
+async def get_async_db() -> AsyncGenerator[AsyncSession, None]:
+    async with AsyncSession(db_client.get_async_engine()) as session:
+        yield session
+
+
+async def admit_request() -> AsyncGenerator[None, None]:
+    """
+    Holds an admission slot for the request, or sheds it with a 503 when the
+    service is overloaded.
+    """
+    if not settings.ADMISSION_ENABLED:
+        yield
+        return
+
+    if not await admission_controller.acquire():
+        raise HTTPException(
+            status_code=503,
+            detail="Service overloaded, retry later.",
+            headers={"Retry-After": str(settings.ADMISSION_RETRY_AFTER_SECONDS)},
+        )
+    try:
+        yield
+    finally:
+        admission_controller.release()
+
+
+def verify_admin_api_key(request: Request) -> None:
+    """
+    Restricts admin routes to requests carrying the ADMIN_API_KEY in their
+    X-Admin-Key header; they are all forbidden while no key is configured.
+    """
+    api_key = request.headers.get("X-Admin-Key")
+    if (
+        not settings.ADMIN_API_KEY
+        or api_key is None
+        # Compared as bytes: compare_digest rejects non-ASCII str
+        or not secrets.compare_digest(
+            api_key.encode(), settings.ADMIN_API_KEY.encode()
+        )
+    ):
+        raise HTTPException(status_code=403, detail="Invalid Admin API Key")
+
+
 SessionDep = Annotated[Session, Depends(get_db)]
+AsyncSessionDep = Annotated[AsyncSession, Depends(get_async_db)]
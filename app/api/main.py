@@ -1,6 +1,8 @@
 from fastapi import APIRouter
-from api.routes import webhooks, health
+from api.routes import webhooks, health, metrics, profiler
 
 api_router = APIRouter()
 api_router.include_router(webhooks.router, prefix="/webhook", tags=["webhook"])
 api_router.include_router(health.router, tags=["health"])
+api_router.include_router(metrics.router, tags=["metrics"])
+api_router.include_router(profiler.router, tags=["admin"])
@@ -1,16 +1,59 @@
-from fastapi import APIRouter
-from sqlmodel import text
+import os
 
-from api.deps import SessionDep
+from fastapi import APIRouter, Response
+from fastapi.responses import JSONResponse
+
+from api.routes.webhooks import lookup_caches
+from core.admission import admission_controller
+from core.broker import outbox, publish_batcher
+from core.dedup import signal_deduplicator
+from core.health import health_monitor
+from core.metrics import WORKER_HEADER
 
 router = APIRouter()
 
 
 @router.get("/HealthCheck")  # dependencies=[Depends(verify_api_key)]
-async def health_check(session: SessionDep):
-    try:
-        # Attempt to execute a simple query to check database connectivity
-        session.exec(text('SELECT 1'))
+async def health_check():
+    # Served from the latest background probe, never queries the database
+    database = health_monitor.result("database")
+    if database is not None and database.ok:
         return {"status": "healthy", "database": "connected"}
-    except Exception as ex:
-        return {"status": "unhealthy", "database": f"not connected, Error: {ex}"}
+    error = database.error if database is not None else "not probed yet"
+    return {"status": "unhealthy", "database": f"not connected, Error: {error}"}
+
+
+@router.get("/Liveness")
+async def liveness():
+    if not health_monitor.is_alive():
+        return JSONResponse(status_code=503, content={"status": "dead"})
+    return {"status": "alive"}
+
+
+@router.get("/Readiness")
+async def readiness():
+    content = {
+        "status": "ready" if health_monitor.is_ready() else "not ready",
+        "checks": health_monitor.stats(),
+    }
+    if not health_monitor.is_ready():
+        return JSONResponse(status_code=503, content=content)
+    return content
+
+
+def service_stats() -> dict:
+    return {
+        "admission": admission_controller.stats(),
+        "publish_batcher": publish_batcher.stats.snapshot(),
+        "outbox": outbox.stats(),
+        "lookup_cache": {cache.name: cache.stats() for cache in lookup_caches},
+        "signal_dedup": signal_deduplicator.stats(),
+        "health": health_monitor.stats(),
+    }
+
+
+@router.get("/Stats")
+async def stats(response: Response):
+    # The stats are those of the worker that served the request
+    response.headers[WORKER_HEADER] = str(os.getpid())
+    return service_stats()
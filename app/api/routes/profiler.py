@@ -0,0 +1,70 @@
+import asyncio
+import os
+from typing import Literal
+
+from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi.responses import JSONResponse, PlainTextResponse
+
+from api.deps import verify_admin_api_key
+from api.utils.webhook_metrics import webhook_requests
+from core.config import settings
+from core.metrics import WORKER_HEADER
+from core.profiler import ProfilerBusyError, sampling_profiler
+
+router = APIRouter()
+
+
+@router.post("/Profile", dependencies=[Depends(verify_admin_api_key)])
+async def profile(
+    seconds: float = Query(10.0, gt=0),
+    requests: int | None = Query(None, gt=0),
+    interval_ms: float = Query(5.0, ge=1, le=1000),
+    format: Literal["speedscope", "collapsed", "summary"] = "speedscope",
+):
+    """
+    Samples the stacks of this worker process for `seconds`, or until it served
+    `requests` more webhook requests, and returns them as a speedscope file, as
+    collapsed stacks (flamegraph.pl), or as a summary of the samples
+    attributed to our modules.
+
+    Only the worker that serves the request is sampled, named by the
+    X-Worker-Pid response header; profile a single-worker server to be sure
+    to catch the traffic of interest.
+    """
+    if seconds > settings.PROFILER_MAX_SECONDS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"A profile lasts at most {settings.PROFILER_MAX_SECONDS}s.",
+        )
+
+    try:
+        result = await asyncio.to_thread(
+            sampling_profiler.capture,
+            seconds=seconds,
+            interval=interval_ms / 1000,
+            requests=requests,
+            requests_total=webhook_requests.total,
+        )
+    except ProfilerBusyError as ex:
+        raise HTTPException(status_code=409, detail=str(ex))
+
+    headers = {WORKER_HEADER: str(os.getpid())}
+    if format == "collapsed":
+        return PlainTextResponse(
+            result.collapsed(),
+            headers={
+                **headers,
+                "Content-Disposition": 'attachment; filename="profile.txt"',
+            },
+        )
+    if format == "speedscope":
+        return JSONResponse(
+            result.speedscope(),
+            headers={
+                **headers,
+                "Content-Disposition": (
+                    'attachment; filename="profile.speedscope.json"'
+                ),
+            },
+        )
+    return JSONResponse(result.summary(), headers=headers)
@@ -1,17 +1,24 @@
 import json
-import re
 import logging
 from fastapi import APIRouter, Depends, HTTPException, Request
+from typing import NamedTuple
 from urllib.parse import unquote
+from datetime import datetime
+from sqlalchemy import and_, bindparam
 from sqlmodel import select
 
 from core.broker import BrokerManager
+from core.cache import TTLCache, cache_invalidation_listener
+from core.dedup import DONE, PENDING, signal_deduplicator
 from core.enums import EventStoreTypeEnum, RoutingTypeEnum
 from core.config import settings
-from api.deps import SessionDep
+from api.deps import AsyncSessionDep, admit_request
 from models import Bot, WebHookSecret, Channel
 from api.utils.signal_reshaper import SignalReshaper
 from api.utils.signal_encryption import SignalEncryption
+from api.utils.webhook_payload import WebhookPayload, loads_json
+from api.utils.webhook_metrics import RequestMetrics, set_path, stage
+from api.utils.indicator_extraction import TEXT_KEYS, get_extraction_plan
 from statics import (
     DEFAULT_INDICATOR_KEYS_MAPPER,
     ENTRY_PRICE_KEY,
@@ -24,6 +31,91 @@ router = APIRouter()
 logger = logging.getLogger(__name__)
 
 
+class WebhookAuthorization(NamedTuple):
+    webhook_secret: str
+    is_active: bool
+    is_signal_encrypted: bool
+    deleted_at: datetime | None
+    channel_id: int | None
+    indicator_keywords_mapper: dict | None
+
+
+class ReshapedSignal(NamedTuple):
+    signal: dict
+    # Identifies retries of the signal, None when they cannot be told apart
+    dedup_key: str | None
+
+
+# Secret, bot and channel in one round trip, built once so SQLAlchemy reuses
+# the compiled statement for every request
+authorization_statement = (
+    select(
+        WebHookSecret.webhook_secret,
+        Bot.is_active,
+        Bot.is_signal_encrypted,
+        Bot.deleted_at,
+        Channel.id,
+        Channel.indicator_keywords_mapper,
+    )
+    .join(Bot, Bot.id == WebHookSecret.bot_id)
+    .outerjoin(
+        Channel,
+        and_(Channel.bot_id == Bot.id, Channel.name == bindparam("channel_name")),
+    )
+    .where(WebHookSecret.webhook_secret == bindparam("webhook_secret"))
+    .limit(1)
+)
+
+# Every secret with each channel of its (live) bot, to warm the cache up front
+warm_up_statement = (
+    select(
+        WebHookSecret.webhook_secret,
+        Bot.is_active,
+        Bot.is_signal_encrypted,
+        Bot.deleted_at,
+        Channel.id,
+        Channel.indicator_keywords_mapper,
+        Channel.name,
+    )
+    .join(Bot, Bot.id == WebHookSecret.bot_id)
+    .join(Channel, Channel.bot_id == Bot.id)
+    .where(Bot.deleted_at.is_(None))
+    .limit(bindparam("limit"))
+)
+
+# Secrets, bots and channels almost never change, cache them in-process
+authorization_cache = TTLCache(
+    name="webhook_authorizations",
+    maxsize=settings.LOOKUP_CACHE_MAXSIZE,
+    ttl=settings.LOOKUP_CACHE_TTL_SECONDS,
+)
+lookup_caches = [authorization_cache]
+for table in (WebHookSecret, Bot, Channel):
+    cache_invalidation_listener.register(table.__tablename__, authorization_cache)
+
+# Answer to a retry of a signal whose first attempt is still being published:
+# it only becomes a duplicate once that attempt succeeds
+IN_FLIGHT_DETAIL = "The signal is already being processed, retry it later."
+
+
+async def warm_authorization_cache(session: AsyncSessionDep) -> int:
+    """
+    Loads the authorizations of every secret and channel into the cache, so
+    the first signals of a fresh worker skip the database. Returns how many
+    were cached.
+    """
+    result = await session.exec(
+        warm_up_statement, params={"limit": authorization_cache.maxsize}
+    )
+    count = 0
+    for *row, channel_name in result:
+        authorization_cache.set(
+            (row[0], str(channel_name).strip()), WebhookAuthorization._make(row)
+        )
+        count += 1
+    return count
+
+
 # Verify Secret Key
 def verify_secret_key_is_provided(request: Request):
     api_key = request.query_params.get("secret_key")
@@ -44,105 +136,363 @@ def verify_label_id(request: Request) -> int:
         raise HTTPException(status_code=400, detail="label_id must be a valid integer.")
 
 
-@router.post("/signals", dependencies=[Depends(verify_secret_key_is_provided)])
-async def create_message(session: SessionDep, request: Request):
-    try:
-        # Parse query parameters
-        secret_key = unquote(request.url.query.split("secret_key=")[1].split("&")[0])
+@router.post(
+    "/signals",
+    dependencies=[Depends(verify_secret_key_is_provided), Depends(admit_request)],
+)
+async def create_message(session: AsyncSessionDep, request: Request):
+    with RequestMetrics("signals") as metrics:
+        with stage("parse"):
+            payload = await WebhookPayload.from_request(request)
+        try:
+            secret_key = get_secret_key(request)
+            metrics.path = signal_path(secret_key, payload)
+            reshaped_signal, dedup_key = await reshape_signal(
+                secret_key=secret_key,
+                session=session,
+                request=request,
+                payload=payload,
+            )
+            if dedup_key is not None:
+                with stage("dedup"):
+                    state = await signal_deduplicator.claim(dedup_key)
+                if state == DONE:
+                    metrics.outcome = "duplicate"
+                    return {"message": "Duplicate signal ignored", "data": None}
+                if state == PENDING:
+                    raise HTTPException(status_code=409, detail=IN_FLIGHT_DETAIL)
+
+            try:
+                with stage("publish"):
+                    await publish_signal(reshaped_signal)
+            except BaseException:
+                if dedup_key is not None:
+                    await signal_deduplicator.release([dedup_key])
+                raise
+            if dedup_key is not None:
+                await signal_deduplicator.complete([dedup_key])
+            return {
+                "message": "Signals saved successfully",
+                "data": reshaped_signal,
+            }
+
+        except HTTPException as http_exc:
+            logger.error(f"HTTP Exception: {http_exc}")
+            content_type = request.headers.get("Content-Type", "").lower()
+            request_info = {
+                "content_type": content_type,
+                "status_code": http_exc.status_code,
+                "detail": http_exc.detail,
+                "body": (
+                    payload.raw
+                    if "json" in content_type
+                    else payload.raw.decode("utf-8", errors="replace")
+                ),
+            }
+            logger.error(f"Request Error: {request_info}")
+            raise http_exc
+
+        except ValueError as val_err:
+            # Re-raise ValueErrors directly
+            raise HTTPException(status_code=400, detail=str(val_err))
+        except Exception as ex:
+            logger.error(f"Internal server error: {ex}")
+            raise HTTPException(
+                status_code=500,
+                detail=f"An internal server error occurred. Due to => {ex}",
+            )
 
-        if secret_key == settings.SECRET_KEY:
-            data = await request.json()
-            label_id = verify_label_id(request=request)
-            reshaped_signal = SignalReshaper.reshape_standard_signal(
-                signal=data, label_id=label_id
+
+@router.post(
+    "/signals/batch",
+    dependencies=[Depends(verify_secret_key_is_provided), Depends(admit_request)],
+)
+async def create_messages(session: AsyncSessionDep, request: Request):
+    """
+    Ingests many signals for one secret_key/label_id: a JSON array or NDJSON.
+
+    The request is authorized once, before any item is read, so an unknown
+    secret or inactive bot fails the whole batch with 403 (even an empty one).
+    Every item is then reshaped on its own and the valid ones are published
+    together, with item failures reported per item.
+    """
+    with RequestMetrics("batch") as metrics:
+        with stage("parse"):
+            payload = await WebhookPayload.from_request(request)
+            items = payload.split()
+        if len(items) > settings.WEBHOOK_BATCH_MAX_ITEMS:
+            raise HTTPException(
+                status_code=413,
+                detail=(
+                    "A batch can hold at most "
+                    f"{settings.WEBHOOK_BATCH_MAX_ITEMS} signals."
+                ),
             )
-            publish_signal(reshaped_signal)
-            return {"message": "Signals saved successfully", "data": reshaped_signal}
 
+        secret_key = get_secret_key(request)
+        metrics.path = signal_path(secret_key, payload)
+        if secret_key == settings.SECRET_KEY:
+            verify_label_id(request=request)
         else:
-            reshaped_signal = await custom_wh_bot_signal(
-                secret_key=secret_key, session=session, request=request
+            await authorize_custom_secret(secret_key, request, session)
+
+        results = []
+        reshaped_signals = []
+        # Keys claimed by the reshaped items, forgotten again if they are not published
+        dedup_keys = []
+        duplicates = 0
+        try:
+            for index, item in enumerate(items):
+                if item.is_json and not isinstance(item.data, dict):
+                    results.append(
+                        batch_error(index, 400, "Each signal must be a JSON object.")
+                    )
+                    continue
+
+                try:
+                    reshaped_signal, dedup_key = await reshape_signal(
+                        secret_key=secret_key,
+                        session=session,
+                        request=request,
+                        payload=item,
+                    )
+                except Exception as ex:
+                    # An unknown secret or inactive bot fails every item alike
+                    if isinstance(ex, HTTPException) and ex.status_code == 403:
+                        raise
+                    results.append(batch_item_error(index, ex))
+                    continue
+
+                if dedup_key is not None:
+                    with stage("dedup"):
+                        state = await signal_deduplicator.claim(dedup_key)
+                    if state == DONE:
+                        duplicates += 1
+                        results.append({"index": index, "status": "duplicate"})
+                        continue
+                    if state == PENDING:
+                        results.append(batch_error(index, 409, IN_FLIGHT_DETAIL))
+                        continue
+                    dedup_keys.append(dedup_key)
+
+                reshaped_signals.append(reshaped_signal)
+                results.append(
+                    {"index": index, "status": "published", "data": reshaped_signal}
+                )
+
+            if reshaped_signals:
+                try:
+                    with stage("publish"):
+                        await publish_signals(reshaped_signals)
+                except Exception as ex:
+                    logger.error(f"Internal server error: {ex}")
+                    raise HTTPException(
+                        status_code=500,
+                        detail=f"An internal server error occurred. Due to => {ex}",
+                    )
+        except BaseException:
+            await signal_deduplicator.release(dedup_keys)
+            raise
+        await signal_deduplicator.complete(dedup_keys)
+
+        return {
+            "message": "Signals processed",
+            "published": len(reshaped_signals),
+            "duplicates": duplicates,
+            "failed": len(items) - len(reshaped_signals) - duplicates,
+            "results": results,
+        }
+
+
+def batch_item_error(index: int, ex: Exception) -> dict:
+    if isinstance(ex, HTTPException):
+        return batch_error(index, ex.status_code, ex.detail)
+    if isinstance(ex, ValueError):
+        return batch_error(index, 400, str(ex))
+
+    logger.error(f"Failed to reshape batch item {index}: {ex}")
+    return batch_error(index, 500, str(ex))
+
+
+def batch_error(index: int, status_code: int, detail) -> dict:
+    return {
+        "index": index,
+        "status": "error",
+        "status_code": status_code,
+        "detail": detail,
+    }
+
+
+def signal_dedup_key(*parts) -> str | None:
+    """
+    Returns the key identifying retries of a reshaped signal from the parts
+    that tell it apart, or None when deduplication is disabled.
+
+    Only signals whose id is sent by the alert can be keyed: standard ones
+    (tv_signal_id, label and event/hit) and encrypted ones carrying a
+    tv_signal_id. Other custom signals get a new id each time they are
+    reshaped, so identical alerts stay separate signals.
+    """
+    if not settings.DEDUP_ENABLED:
+        return None
+    return signal_deduplicator.make_key(*parts)
+
+
+def get_secret_key(request: Request) -> str:
+    return unquote(request.url.query.split("secret_key=")[1].split("&")[0])
+
+
+def signal_path(secret_key: str, payload: WebhookPayload) -> str:
+    """
+    Returns the metrics path of a signal, refined to "encrypted" once its bot
+    is known.
+    """
+    if secret_key == settings.SECRET_KEY:
+        return "standard"
+    return "custom-json" if payload.is_json else "custom-text"
+
+
+async def reshape_signal(
+    secret_key: str,
+    session: AsyncSessionDep,
+    request: Request,
+    payload: WebhookPayload,
+) -> ReshapedSignal:
+    if secret_key == settings.SECRET_KEY:
+        data = payload.json()
+        label_id = verify_label_id(request=request)
+        with stage("reshape"):
+            signal = SignalReshaper.reshape_standard_signal(
+                signal=data, label_id=label_id
             )
-            publish_signal(reshaped_signal)
-            return {"message": "Signals saved successfully", "data": reshaped_signal}
-
-    except HTTPException as http_exc:
-        logger.error(f"HTTP Exception: {http_exc}")
-        content_type = request.headers.get("Content-Type", "").lower()
-        request_info = {
-            "content_type": content_type,
-            "status_code": http_exc.status_code,
-            "detail": http_exc.detail,
-            "body": (
-                await request.body()
-                if "json" in content_type
-                else await (await request.body()).decode("utf-8")
+        return ReshapedSignal(
+            signal,
+            signal_dedup_key(
+                "standard", signal["tv_signal_id"], signal["event"], signal["hit"]
             ),
-        }
-        logger.error(f"Request Error: {request_info}")
-        raise http_exc
-
-    except ValueError as val_err:
-        # Re-raise ValueErrors directly
-        raise HTTPException(status_code=400, detail=str(val_err))
-    except Exception as ex:
-        logger.error(f"Internal server error: {ex}")
-        raise HTTPException(
-            status_code=500, detail=f"An internal server error occurred. Due to => {ex}"
         )
 
+    return await custom_wh_bot_signal(
+        secret_key=secret_key, session=session, request=request, payload=payload
+    )
+
+
+def signal_partition_key(reshaped_signal: dict) -> str:
+    """
+    Returns the key whose signals must stay in order: the strategy and symbol of
+    standard signals, the webhook secret of custom ones.
+    """
+    webhook_secret = reshaped_signal.get("webhook_secret")
+    if webhook_secret is not None:
+        return webhook_secret
+    return f"{reshaped_signal.get('strategy')}:{reshaped_signal.get('symbol')}"
+
+
+async def publish_signal(reshaped_signal):
+    await BrokerManager(
+        event_store_key=EventStoreTypeEnum.SIGNAL_STREAM
+    ).apublish_event(
+        routing_key=RoutingTypeEnum.SIGNAL_STREAM,
+        message=reshaped_signal,
+        partition_key=signal_partition_key(reshaped_signal),
+    )
+
 
-def publish_signal(reshaped_signal):
-    BrokerManager(event_store_key=EventStoreTypeEnum.SIGNAL_STREAM).publish_event(
-        routing_key=RoutingTypeEnum.SIGNAL_STREAM, message=reshaped_signal
+async def publish_signals(reshaped_signals: list[dict]):
+    await BrokerManager(
+        event_store_key=EventStoreTypeEnum.SIGNAL_STREAM
+    ).apublish_events(
+        routing_key=RoutingTypeEnum.SIGNAL_STREAM,
+        messages=reshaped_signals,
+        partition_keys=[signal_partition_key(signal) for signal in reshaped_signals],
     )
 
 
 async def custom_wh_bot_signal(
-    secret_key: str, session: SessionDep, request: Request
-) -> dict:
-    webhook_secret_data = get_webhook_secret_data(secret_key, session)
-    bot = get_bot(webhook_secret_data.bot_id, session)
+    secret_key: str,
+    session: AsyncSessionDep,
+    request: Request,
+    payload: WebhookPayload,
+) -> ReshapedSignal:
+    channel_name = extract_channel_name(request, payload)
+    with stage("lookup"):
+        authorization = await get_webhook_authorization(
+            secret_key, channel_name, session
+        )
 
-    if not bot.is_active or bot.deleted_at is not None:
-        raise HTTPException(status_code=403, detail="No bots are active for this hook!")
+    verify_bot_is_active(authorization)
 
-    channel_name = await extract_channel_name(request)
-    if bot.is_signal_encrypted:
-        return await handle_encrypted_signal(request, channel_name, webhook_secret_data)
+    if authorization.is_signal_encrypted:
+        set_path("encrypted")
+        return handle_encrypted_signal(payload, channel_name, authorization)
 
-    channel = get_channel(channel_name, bot.id, session)
-    extracted_values = await extract_predefined_indicator_values(
-        request, channel.indicator_keywords_mapper or DEFAULT_INDICATOR_KEYS_MAPPER
-    )
+    if authorization.channel_id is None:
+        raise HTTPException(
+            status_code=404, detail=f"Channel {channel_name} not found!"
+        )
+
+    with stage("extract"):
+        extracted_values = extract_predefined_indicator_values(
+            request,
+            payload,
+            authorization.indicator_keywords_mapper or DEFAULT_INDICATOR_KEYS_MAPPER,
+        )
     extracted_values["channel"] = channel_name
 
-    return SignalReshaper.reshape_custom_signal(
-        signal=extracted_values,
-        webhook_secret_key=webhook_secret_data.webhook_secret,
-    )
+    with stage("reshape"):
+        signal = SignalReshaper.reshape_custom_signal(
+            signal=extracted_values,
+            webhook_secret_key=authorization.webhook_secret,
+        )
+    return ReshapedSignal(signal, None)
+
+
+async def authorize_custom_secret(
+    secret_key: str, request: Request, session: AsyncSessionDep
+) -> None:
+    """
+    Checks that a custom secret exists and its bot is live, whatever the
+    channel: the secret and bot are found even when the channel is not.
+    """
+    channel_name = str(request.query_params.get("channel", "default")).strip()
+    with stage("lookup"):
+        authorization = await get_webhook_authorization(
+            secret_key, channel_name, session
+        )
+    verify_bot_is_active(authorization)
 
 
-def get_webhook_secret_data(secret_key: str, session: SessionDep) -> WebHookSecret:
-    statement = select(WebHookSecret).where(WebHookSecret.webhook_secret == secret_key)
-    webhook_secret_data = session.exec(statement).first()
-    if webhook_secret_data is None:
-        raise HTTPException(status_code=403, detail="Invalid Secret Key")
-    return webhook_secret_data
+def verify_bot_is_active(authorization: WebhookAuthorization) -> None:
+    if not authorization.is_active or authorization.deleted_at is not None:
+        raise HTTPException(status_code=403, detail="No bots are active for this hook!")
+
+
+async def get_webhook_authorization(
+    secret_key: str, channel_name: str, session: AsyncSessionDep
+) -> WebhookAuthorization:
+    authorization = authorization_cache.get((secret_key, channel_name))
+    if authorization is not None:
+        return authorization
 
+    result = await session.exec(
+        authorization_statement,
+        params={"webhook_secret": secret_key, "channel_name": channel_name},
+    )
+    row = result.first()
+    if row is None:
+        raise HTTPException(status_code=403, detail="Invalid Secret Key")
 
-def get_bot(bot_id: int, session: SessionDep) -> Bot:
-    statement = select(Bot).where(Bot.id == bot_id)
-    bot = session.exec(statement).first()
-    return bot
+    authorization = WebhookAuthorization._make(row)
+    authorization_cache.set((secret_key, channel_name), authorization)
+    return authorization
 
 
-async def extract_channel_name(request: Request) -> str:
+def extract_channel_name(request: Request, payload: WebhookPayload) -> str:
     name = None
     try:
         name = request.query_params.get("channel", None)
         if name is None:
-            data = await request.json()
+            data = payload.json()
             name = data.get("channel")
     except json.JSONDecodeError:
         name = "default"
@@ -150,74 +500,63 @@ async def extract_channel_name(request: Request) -> str:
     return str(name).strip()
 
 
-async def handle_encrypted_signal(
-    request: Request, channel_name: str, webhook_secret_data: WebHookSecret
-) -> dict:
-    data = await request.json()
+def handle_encrypted_signal(
+    payload: WebhookPayload, channel_name: str, authorization: WebhookAuthorization
+) -> ReshapedSignal:
+    data = payload.json()
     if not data.get("data"):
         raise HTTPException(
             status_code=400, detail="data is required in the request body."
         )
 
-    signal = SignalEncryption.decrypt(
-        ciphertext=data["data"], key=settings.ENCRYPTION_KEY
-    )
-    signal = json.loads(signal)
+    with stage("decrypt"):
+        signal = SignalEncryption.decrypt(
+            ciphertext=data["data"], key=settings.ENCRYPTION_KEY
+        )
+        signal = loads_json(signal)
     signal["channel"] = channel_name
 
-    return SignalReshaper.reshape_custom_signal(
-        signal=signal, webhook_secret_key=webhook_secret_data.webhook_secret
-    )
-
+    with stage("reshape"):
+        reshaped_signal = SignalReshaper.reshape_custom_signal(
+            signal=signal, webhook_secret_key=authorization.webhook_secret
+        )
 
-def get_channel(channel_name: str, bot_id: int, session: SessionDep) -> Channel:
-    statement = select(Channel).where(
-        Channel.name == channel_name, Channel.bot_id == bot_id
-    )
-    channel = session.exec(statement).first()
-    if channel is None:
-        raise HTTPException(
-            status_code=404, detail=f"Channel {channel_name} not found!"
+    dedup_key = None
+    if signal.get("tv_signal_id") is not None:
+        dedup_key = signal_dedup_key(
+            "encrypted",
+            authorization.webhook_secret,
+            reshaped_signal["tv_signal_id"],
+            reshaped_signal["event"],
         )
-    return channel
+    return ReshapedSignal(reshaped_signal, dedup_key)
 
 
-async def extract_predefined_indicator_values(request: Request, mapper: dict) -> dict:
+def extract_predefined_indicator_values(
+    request: Request, payload: WebhookPayload, mapper: dict
+) -> dict:
     extracted_values = {}
-    # List of text keys for edge cases
-    text_keys = ["content", "contents", "message", "text", "body"]
-
-    # Filter out None values from the mapper
-    valid_mapper = {
-        key: keyword for key, keyword in mapper.items() if keyword is not None
-    }
+    plan = get_extraction_plan(mapper)
 
     try:
-        data = await request.json()
+        data = payload.json()
         extracted_values["event"] = data.get("event")
         extracted_values["side"] = data.get("side")
 
         # Edge case where the side is sent as description
-        if bool(set(text_keys) & set(data.keys())):
+        if not TEXT_KEYS.isdisjoint(data.keys()):
             raise json.JSONDecodeError("Special case with json and text.", "data", 0)
 
-        for key, keyword in valid_mapper.items():
+        for key, keyword in plan.mapper_items:
             extracted_values[key] = data.get(keyword, None)
 
     except json.JSONDecodeError:
-        content = (await request.body()).decode("utf-8")
+        values, side = plan.extract(payload.text)
         extracted_values["event"] = request.query_params.get("event")
-        side_match = re.search(r"\b(sell|buy|long|short)\b", content, re.IGNORECASE)
         extracted_values["side"] = (
-            side_match.group(1).lower()
-            if side_match
-            else request.query_params.get("side", None)
+            side if side else request.query_params.get("side", None)
         )
-
-        for key, keyword in valid_mapper.items():
-            pattern = rf"{re.escape(keyword)}[:=]\s*(\d+\.?\d*)"
-            match = re.search(pattern, content, re.IGNORECASE)
-            extracted_values[key] = float(match.group(1)) if match else None
+        extracted_values.update(values)
 
     sl = extracted_values.pop(STOP_LOSS_KEY, None)
     extracted_values["sl"] = str(sl) if sl else None
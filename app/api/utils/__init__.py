@@ -2,10 +2,12 @@ from api.utils.price_convertor import clean_price_string
 from api.utils.time_convertor import convert_to_minutes
 from api.utils.channel_label_generator import generate_random_channel_label
 from api.utils.signal_encryption import SignalEncryption
+from api.utils.webhook_payload import WebhookPayload
 
 __all__ = [
     "clean_price_string",
     "convert_to_minutes",
     "generate_random_channel_label",
     "SignalEncryption",
+    "WebhookPayload",
 ]
\ No newline at end of file
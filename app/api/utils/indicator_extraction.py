@@ -0,0 +1,59 @@
+import re
+from functools import lru_cache
+
+# Body keys that mark a JSON alert carrying its values as free text
+TEXT_KEYS = frozenset(["content", "contents", "message", "text", "body"])
+
+SIDE_PATTERN = re.compile(r"\b(sell|buy|long|short)\b", re.IGNORECASE)
+
+
+class ExtractionPlan:
+    __slots__ = ("mapper_items", "keyword_patterns")
+
+    def __init__(self, mapper_items: tuple[tuple[str, str], ...]) -> None:
+        """
+        Precompiled extraction of the indicator values of a text body.
+
+        :param mapper_items: The (key, keyword) pairs of an indicator mapper.
+        """
+        self.mapper_items = mapper_items
+        self.keyword_patterns = tuple(
+            (
+                key,
+                re.compile(rf"{re.escape(keyword)}[:=]\s*(\d+\.?\d*)", re.IGNORECASE),
+            )
+            for key, keyword in mapper_items
+        )
+
+    def extract(self, content: str) -> tuple[dict[str, float | None], str | None]:
+        """
+        Returns the first value of every mapped key (None when missing) and the
+        first side found in the content.
+        """
+        side_match = SIDE_PATTERN.search(content)
+        side = side_match.group(1).lower() if side_match else None
+
+        values = {}
+        for key, pattern in self.keyword_patterns:
+            match = pattern.search(content)
+            values[key] = float(match.group(1)) if match else None
+        return values, side
+
+
+@lru_cache(maxsize=1024)
+def _compile_extraction_plan(
+    mapper_items: tuple[tuple[str, str], ...]
+) -> ExtractionPlan:
+    return ExtractionPlan(mapper_items)
+
+
+def get_extraction_plan(mapper: dict) -> ExtractionPlan:
+    """
+    Returns the compiled extraction plan of an indicator mapper.
+
+    Plans are cached by the mapper's content, so every channel sharing a mapper
+    (e.g. `DEFAULT_INDICATOR_KEYS_MAPPER`) compiles it once.
+    """
+    return _compile_extraction_plan(
+        tuple((key, keyword) for key, keyword in mapper.items() if keyword is not None)
+    )
@@ -1,5 +1,12 @@
 import re
+from functools import lru_cache
 
+# Every character that interferes with parsing a price as a float
+NON_PRICE_CHARS = re.compile(r"[^\d.-]")
+
+
+# Signals repeat the same price strings (e.g. "1.5%" take-profits) a lot
+@lru_cache(maxsize=4096)
 def clean_price_string(price_str: str) -> str:
     """
     Cleans a string by removing all characters that interfere with parsing it as a float.
@@ -11,7 +18,7 @@ def clean_price_string(price_str: str) -> str:
         float: The cleaned price value.
     """
     # Use regex to keep only digits, decimal points, and negative sign
-    cleaned_str = re.sub(r"[^\d.-]", "", price_str)
+    cleaned_str = NON_PRICE_CHARS.sub("", price_str)
 
     # Handle edge cases and convert to float
     try:
@@ -1,4 +1,30 @@
 import base64
+from collections.abc import Iterable
+from functools import lru_cache
+
+BASE64_ALPHABET = b"ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz0123456789+/"
+PADDING = b"="
+
+# One translation table per shift, mapping every Base64 character back to the
+# character `shift` positions before it (padding is preserved)
+_UNSHIFT_TABLES = tuple(
+    bytes.maketrans(
+        BASE64_ALPHABET + PADDING,
+        BASE64_ALPHABET[-shift:] + BASE64_ALPHABET[:-shift] + PADDING
+        if shift
+        else BASE64_ALPHABET + PADDING,
+    )
+    for shift in range(64)
+)
+
+
+@lru_cache(maxsize=32)
+def _key_unshift_tables(key: str) -> tuple[bytes, ...]:
+    """
+    Returns the translation table of every key position, computed once per key.
+    """
+    return tuple(_UNSHIFT_TABLES[ord(key_char) % 64] for key_char in key)
+
 
 class SignalEncryption:
     @staticmethod
@@ -15,41 +41,50 @@ class SignalEncryption:
         """
         assert key, "Key must not be empty"
         assert ciphertext, "Encrypted string must not be empty"
-        
-        base64_alphabet = (
-            "ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz0123456789+/"
-        )
-        decrypted_base64 = ""
-        key_length = len(key)
-
-        ciphertext = base64.b64decode(ciphertext).decode()
 
-        for i, char in enumerate(ciphertext):
-            if char == "=":
-                decrypted_base64 += "="  # Preserve padding
-                continue
+        encrypted_base64 = base64.b64decode(ciphertext)
 
-            # Find the index of the character in the Base64 alphabet
-            idx = base64_alphabet.find(char)
-            if idx == -1:
-                raise ValueError(f"Invalid Base64 character: {char}")
+        if encrypted_base64.translate(None, BASE64_ALPHABET + PADDING):
+            valid_chars = (BASE64_ALPHABET + PADDING).decode()
+            invalid_char = next(
+                char
+                for char in encrypted_base64.decode("utf-8", errors="replace")
+                if char not in valid_chars
+            )
+            raise ValueError(f"Invalid Base64 character: {invalid_char}")
 
-            # Calculate the shift dynamically using the key
-            key_char = key[i % key_length] if key_length > 0 else ""
-            shift = ord(key_char) % 64 if key_char else 0
-
-            # Reverse the shift to get the original Base64 character index
-            original_idx = (idx - shift) % 64
-            decrypted_base64 += base64_alphabet[original_idx]
+        # Every key position shifts the characters at the same offset modulo the
+        # key length, so reverse the shift one stride at a time
+        tables = _key_unshift_tables(key)
+        key_length = len(tables)
+        decrypted_base64 = bytearray(len(encrypted_base64))
+        for offset, table in enumerate(tables[: len(encrypted_base64)]):
+            decrypted_base64[offset::key_length] = encrypted_base64[
+                offset::key_length
+            ].translate(table)
 
         # Decode the Base64 string to get the original message
         try:
             # Add padding if necessary
             padding_length = len(decrypted_base64) % 4
             if padding_length:
-                decrypted_base64 += "=" * (4 - padding_length)
+                decrypted_base64 += PADDING * (4 - padding_length)
 
             original_message = base64.b64decode(decrypted_base64).decode("utf-8")
             return original_message
         except Exception as e:
             raise ValueError(f"Failed to decode ciphertext: {e}")
+
+    @staticmethod
+    def decrypt_many(ciphertexts: Iterable[str], key: str) -> list[str]:
+        """
+        Decrypts several ciphertexts encrypted with the same key.
+
+        Args:
+            ciphertexts (Iterable[str]): The encrypted Base64 strings.
+            key (str): The encryption key used during encryption.
+
+        Returns:
+            list[str]: The decrypted messages, in order.
+        """
+        return [SignalEncryption.decrypt(ciphertext, key) for ciphertext in ciphertexts]
@@ -8,6 +8,23 @@ from api.utils import (
     convert_to_minutes,
 )
 
+# Lookup tables shared by every reshape instead of being rebuilt per signal
+TAKE_PROFIT_KEYS = tuple(f"tp{i}" for i in range(1, 9))
+TAKE_PROFIT_HIT_KEYS = tuple((f"tp{i}_hit", f"TP{i}") for i in range(1, 9))
+ENTRY_HIT_VALUES = ("1", "2", "3", "4", "5", "6", "7", "8")
+EVENTS = {
+    "open": "open",
+    "formed": "open",
+    "update": "update",
+    "updated": "update",
+    "close": "close",
+    "invalidated": "close",
+    "close-all": "close-all",
+    "close_all": "close-all",
+    "close all": "close-all",
+}
+SIDES = {"buy": "buy", "long": "buy", "sell": "sell", "short": "sell"}
+
 
 class SignalReshaper:
     @staticmethod
@@ -45,7 +62,7 @@ class SignalReshaper:
         if hit == "ENTRY":
             # pass tps value from tp1 to tp8
             take_profits_data = SignalReshaper.format_take_profit_prices(
-                take_profits=[signal.get(f"tp{i}") for i in range(1, 9)]
+                take_profits=[signal.get(key) for key in TAKE_PROFIT_KEYS]
             )
             reshaped_signal.update(take_profits_data)
         else:
@@ -112,20 +129,13 @@ class SignalReshaper:
         if event is None:
             return "open"
 
-        match event.lower():
-            case "open" | "formed":
-                return "open"
-            case "update" | "updated":
-                return "update"
-            case "close" | "invalidated":
-                return "close"
-            case "close-all" | "close_all" | "close all":
-                return "close-all"
-            case _:
-                raise HTTPException(
-                    status_code=400,
-                    detail="Invalid event value, accepted options (open, update, close, close-all, formed, updated, invalidated)",
-                )
+        checked_event = EVENTS.get(event.lower())
+        if checked_event is None:
+            raise HTTPException(
+                status_code=400,
+                detail="Invalid event value, accepted options (open, update, close, close-all, formed, updated, invalidated)",
+            )
+        return checked_event
 
     @classmethod
     def order_type_checker(cls, order_type) -> str:
@@ -145,13 +155,10 @@ class SignalReshaper:
         if side is None:
             raise HTTPException(status_code=400, detail="Side is required")
 
-        match side.lower():
-            case "buy" | "long":
-                return "buy"
-            case "sell" | "short":
-                return "sell"
-            case _:
-                raise HTTPException(status_code=400, detail="Invalid side")
+        checked_side = SIDES.get(side.lower())
+        if checked_side is None:
+            raise HTTPException(status_code=400, detail="Invalid side")
+        return checked_side
 
     @classmethod
     def symbol_checker(cls, symbol) -> str:
@@ -208,33 +215,34 @@ class SignalReshaper:
                 status_code=400, detail="Take profit values are invalided."
             )
 
-        # take profit has three shapes: currency or percentage or risk_reward
-        take_profit_data = {"percentage": [], "risk_reward": [], "currency": []}
+        # take profit has three shapes: currency or percentage or risk_reward,
+        # classify and clean them in one pass
+        take_profit_type = None
+        mixed_types = False
+        take_profit_values = []
         for tp in take_profits:
             tp = tp.lower()
-            # Determine type and add to the corresponding list
             if "%" in tp:
-                take_profit_data["percentage"].append(
-                    clean_price_string(tp.replace("%", ""))
-                )
-            elif "r" in tp or "rr" in tp:
-                take_profit_data["risk_reward"].append(
-                    clean_price_string(tp.replace("rr", "").replace("r", ""))
-                )
+                tp_type = "percentage"
+                tp = tp.replace("%", "")
+            elif "r" in tp:
+                tp_type = "risk_reward"
+                tp = tp.replace("rr", "").replace("r", "")
             else:
-                take_profit_data["currency"].append(clean_price_string(tp))
+                tp_type = "currency"
+
+            take_profit_values.append(clean_price_string(tp))
+            if take_profit_type is None:
+                take_profit_type = tp_type
+            elif tp_type != take_profit_type:
+                mixed_types = True
 
         # Check that only one take-profit type is used
-        non_empty_types = [key for key, values in take_profit_data.items() if values]
-        if len(non_empty_types) != 1:
+        if mixed_types or take_profit_type is None:
             raise HTTPException(
                 status_code=400, detail="All take-profits must be of the same type."
             )
 
-        # Return the take-profit type and values
-        take_profit_type = non_empty_types[0]
-        take_profit_values = take_profit_data[take_profit_type]
-
         return {
             "take_profit_type": take_profit_type,
             "take_profit_values": take_profit_values,
@@ -277,17 +285,16 @@ class SignalReshaper:
     def format_hit_field(cls, signal: dict) -> str:
         # Check if the message contains "entry_hit"
         # ? e.g., "entry_hit": "1"
-        if signal.get("entry_hit") in ["1", "2", "3", "4", "5", "6", "7", "8"]:
-            return "entry".upper()
+        if signal.get("entry_hit") in ENTRY_HIT_VALUES:
+            return "ENTRY"
 
         # Check if the message contains "sl_hit"
         # ? e.g., "sl_hit": "1"
         if signal.get("sl_hit") == "1":
-            return "sl".upper()
+            return "SL"
 
         # Loop through possible tp hits from tp1 to tp8
         # ? e.g., "tp2_hit": "1"
-        for i in range(1, 9):
-            tp_key = f"tp{i}_hit"
+        for tp_key, hit in TAKE_PROFIT_HIT_KEYS:
             if signal.get(tp_key) == "1":
-                return f"tp{i}".upper()
+                return hit
@@ -0,0 +1,106 @@
+import time
+from contextvars import ContextVar
+
+from fastapi import HTTPException
+
+from core.metrics import registry
+
+webhook_requests = registry.counter(
+    "webhook_requests_total",
+    "Webhook requests by endpoint, signal path and outcome.",
+    ("endpoint", "path", "outcome"),
+)
+webhook_request_seconds = registry.histogram(
+    "webhook_request_duration_seconds",
+    "Webhook request latency by endpoint, signal path and outcome.",
+    ("endpoint", "path", "outcome"),
+)
+webhook_stage_seconds = registry.histogram(
+    "webhook_stage_duration_seconds",
+    "Latency of every stage of the webhook pipeline by signal path.",
+    ("path", "stage", "outcome"),
+)
+
+_current_request: ContextVar["RequestMetrics | None"] = ContextVar(
+    "webhook_request_metrics", default=None
+)
+
+
+class RequestMetrics:
+    __slots__ = ("endpoint", "path", "outcome", "started_at", "stages", "_token")
+
+    def __init__(self, endpoint: str, path: str = "unknown") -> None:
+        """
+        Times one webhook request and its stages.
+
+        Stage timings are buffered and only recorded when the request ends,
+        under the path it finally took: an encrypted bot is only known once its
+        secret was looked up.
+        """
+        self.endpoint = endpoint
+        self.path = path
+        self.outcome = "published"
+        self.started_at = 0.0
+        self.stages: list[tuple[str, float, str]] = []
+        self._token = None
+
+    def __enter__(self) -> "RequestMetrics":
+        self.started_at = time.perf_counter()
+        self._token = _current_request.set(self)
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        elapsed = time.perf_counter() - self.started_at
+        _current_request.reset(self._token)
+
+        if exc_type is not None:
+            rejected = isinstance(exc, HTTPException) and exc.status_code < 500
+            self.outcome = "rejected" if rejected else "error"
+
+        for stage, seconds, outcome in self.stages:
+            webhook_stage_seconds.observe(seconds, self.path, stage, outcome)
+        webhook_request_seconds.observe(
+            elapsed, self.endpoint, self.path, self.outcome
+        )
+        webhook_requests.inc(self.endpoint, self.path, self.outcome)
+
+
+class StageTimer:
+    __slots__ = ("request", "name", "started_at")
+
+    def __init__(self, request: RequestMetrics | None, name: str) -> None:
+        self.request = request
+        self.name = name
+        self.started_at = 0.0
+
+    def __enter__(self) -> "StageTimer":
+        self.started_at = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        if self.request is not None:
+            self.request.stages.append(
+                (
+                    self.name,
+                    time.perf_counter() - self.started_at,
+                    "ok" if exc_type is None else "error",
+                )
+            )
+
+
+def stage(name: str) -> StageTimer:
+    """
+    Times a stage of the current webhook request (a no-op outside of one).
+    """
+    return StageTimer(_current_request.get(), name)
+
+
+def set_path(path: str) -> None:
+    """
+    Sets the signal path (standard, custom-json, custom-text or encrypted) of
+    the current webhook request.
+    """
+    request = _current_request.get()
+    if request is not None:
+        request.path = path
+
@@ -0,0 +1,89 @@
+import json
+import orjson
+from fastapi import Request
+
+# Marker for bodies that are not valid JSON (e.g. plain-text TradingView alerts)
+NOT_JSON = object()
+
+
+def loads_json(raw: bytes | str):
+    """
+    Parses JSON with orjson, falling back to the standard library for what only
+    it accepts and TradingView may send: a UTF-8 BOM and NaN/Infinity (e.g. an
+    unset plot value), which are read as null like orjson publishes them.
+
+    Raises `ValueError` (e.g. `json.JSONDecodeError`) for invalid JSON.
+    """
+    try:
+        return orjson.loads(raw)
+    except orjson.JSONDecodeError:
+        if isinstance(raw, str):
+            raw = raw.removeprefix("\ufeff")
+        return json.loads(raw, parse_constant=lambda constant: None)
+
+
+class WebhookPayload:
+    __slots__ = ("raw", "data", "_text")
+
+    def __init__(self, raw: bytes) -> None:
+        """
+        Request body read and decoded once, then passed through the whole pipeline.
+
+        :param raw: The raw request body.
+        """
+        self.raw = raw
+        try:
+            self.data = loads_json(raw)
+        except ValueError:
+            self.data = NOT_JSON
+        self._text = None
+
+    @classmethod
+    async def from_request(cls, request: Request) -> "WebhookPayload":
+        return cls(await request.body())
+
+    @classmethod
+    def from_data(cls, data) -> "WebhookPayload":
+        """
+        Payload of an already parsed JSON value, e.g. one item of a batch.
+        """
+        payload = cls.__new__(cls)
+        payload.raw = orjson.dumps(data)
+        payload.data = data
+        payload._text = None
+        return payload
+
+    def split(self) -> list["WebhookPayload"]:
+        """
+        Splits a batch body into one payload per signal.
+
+        A JSON array gives one payload per item, a single JSON value gives
+        itself, and anything else is read as NDJSON: one payload per non-empty
+        line, each parsed on its own (so plain-text lines stay text alerts).
+        """
+        if isinstance(self.data, list):
+            return [WebhookPayload.from_data(item) for item in self.data]
+        if self.is_json:
+            return [self]
+        return [WebhookPayload(line) for line in self.raw.splitlines() if line.strip()]
+
+    @property
+    def is_json(self) -> bool:
+        return self.data is not NOT_JSON
+
+    @property
+    def text(self) -> str:
+        """The body decoded as UTF-8 text."""
+        if self._text is None:
+            self._text = self.raw.decode("utf-8")
+        return self._text
+
+    def json(self):
+        """
+        Returns the parsed JSON body.
+
+        Raises `json.JSONDecodeError` for non-JSON bodies, like `Request.json()`.
+        """
+        if self.data is NOT_JSON:
+            raise json.JSONDecodeError("Request body is not valid JSON.", "body", 0)
+        return self.data
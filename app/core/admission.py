@@ -0,0 +1,92 @@
+import asyncio
+import time
+
+from core.config import settings
+
+
+class AdmissionController:
+    def __init__(
+        self,
+        max_concurrency: int | None = None,
+        high_watermark: int | None = None,
+        low_watermark: int | None = None,
+    ) -> None:
+        """
+        Bounds the webhook requests processed at once.
+
+        At most `max_concurrency` requests run at a time, the others wait in a
+        queue. Once `high_watermark` requests are waiting, new ones are shed
+        until the queue drains back to `low_watermark`, so an alert storm gets
+        fast rejections instead of piling onto the database and the broker.
+        """
+        self.max_concurrency = max_concurrency or settings.ADMISSION_MAX_CONCURRENCY
+        if high_watermark is None:
+            high_watermark = settings.ADMISSION_HIGH_WATERMARK
+        self.high_watermark = high_watermark
+        if low_watermark is None:
+            low_watermark = settings.ADMISSION_LOW_WATERMARK
+        self.low_watermark = min(low_watermark, self.high_watermark)
+        self.in_flight = 0
+        self.waiting = 0
+        self.max_waiting = 0
+        self.admitted = 0
+        self.shed = 0
+        self.shedding = False
+        self.wait_seconds_total = 0.0
+        self.max_wait_seconds = 0.0
+        self._semaphore = asyncio.Semaphore(self.max_concurrency)
+
+    async def acquire(self) -> bool:
+        """
+        Waits for a free slot, returns False when the request is shed instead.
+
+        Admitted requests must `release` their slot once done.
+        """
+        if self._should_shed():
+            self.shed += 1
+            return False
+
+        self.waiting += 1
+        self.max_waiting = max(self.max_waiting, self.waiting)
+        started_at = time.perf_counter()
+        try:
+            await self._semaphore.acquire()
+        finally:
+            self.waiting -= 1
+
+        wait_seconds = time.perf_counter() - started_at
+        self.wait_seconds_total += wait_seconds
+        self.max_wait_seconds = max(self.max_wait_seconds, wait_seconds)
+        self.admitted += 1
+        self.in_flight += 1
+        return True
+
+    def release(self) -> None:
+        self.in_flight -= 1
+        self._semaphore.release()
+
+    def _should_shed(self) -> bool:
+        if self.shedding:
+            self.shedding = self.waiting > self.low_watermark
+        else:
+            self.shedding = (
+                self._semaphore.locked() and self.waiting >= self.high_watermark
+            )
+        return self.shedding
+
+    def stats(self) -> dict:
+        admitted = self.admitted or 1
+        return {
+            "max_concurrency": self.max_concurrency,
+            "in_flight": self.in_flight,
+            "waiting": self.waiting,
+            "max_waiting": self.max_waiting,
+            "admitted": self.admitted,
+            "shed": self.shed,
+            "shedding": self.shedding,
+            "avg_wait_ms": round(self.wait_seconds_total / admitted * 1000, 3),
+            "max_wait_ms": round(self.max_wait_seconds * 1000, 3),
+        }
+
+
+admission_controller = AdmissionController()
@@ -1,10 +1,35 @@
+from core.broker.serializers import (
+    Serializer,
+    get_serializer,
+    register_serializer,
+    validate_serialization_settings,
+)
+from core.broker.topology import BrokerTopology, topology
+from core.broker.consumer import AckTracker, ConcurrentConsumer
 from core.broker.broker import AMQPClient, BrokerClient
+from core.broker.pool import PublisherPool, publisher_pool
+from core.broker.batcher import PublishBatcher, publish_batcher
+from core.broker.outbox import Outbox, outbox
 from core.broker.broker_manager import BrokerManager
 from core.broker.utils import QueueExchangeUtil
 
 __all__ = [
+    "Serializer",
+    "get_serializer",
+    "register_serializer",
+    "validate_serialization_settings",
+    "BrokerTopology",
+    "topology",
+    "AckTracker",
+    "ConcurrentConsumer",
     "BrokerClient",
     "AMQPClient",
+    "PublisherPool",
+    "publisher_pool",
+    "PublishBatcher",
+    "publish_batcher",
+    "Outbox",
+    "outbox",
     "BrokerManager",
     "QueueExchangeUtil",
 ]
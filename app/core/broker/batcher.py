@@ -0,0 +1,211 @@
+import asyncio
+import logging
+from collections import defaultdict
+from typing import Any
+
+from core.broker.pool import publisher_pool
+from core.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+class BatchStats:
+    def __init__(self) -> None:
+        """
+        Running batch size and linger time statistics of a `PublishBatcher`.
+        """
+        self.batches = 0
+        self.messages = 0
+        self.max_batch_size = 0
+        self.linger_seconds_total = 0.0
+        self.max_linger_seconds = 0.0
+
+    def record(self, batch_size: int, linger_seconds: float) -> None:
+        self.batches += 1
+        self.messages += batch_size
+        self.max_batch_size = max(self.max_batch_size, batch_size)
+        self.linger_seconds_total += linger_seconds
+        self.max_linger_seconds = max(self.max_linger_seconds, linger_seconds)
+
+    def snapshot(self) -> dict:
+        batches = self.batches or 1
+        return {
+            "batches": self.batches,
+            "messages": self.messages,
+            "avg_batch_size": round(self.messages / batches, 2),
+            "max_batch_size": self.max_batch_size,
+            "avg_linger_ms": round(self.linger_seconds_total / batches * 1000, 3),
+            "max_linger_ms": round(self.max_linger_seconds * 1000, 3),
+        }
+
+
+class PublishBatcher:
+    def __init__(
+        self, max_size: int | None = None, linger_ms: int | None = None
+    ) -> None:
+        """
+        Collects messages from concurrent publishers and flushes them together.
+
+        A batch is flushed once it holds `max_size` messages or its first message
+        has waited `linger_ms` milliseconds, whichever comes first. Each batch is
+        published over a single pooled channel, after the previous batches that
+        hold messages of the same queue (event store, routing key and partition),
+        so batches of different queues are published concurrently while each
+        queue receives its messages in order.
+        """
+        self.max_size = max_size or settings.BROKER_BATCH_MAX_SIZE
+        self.linger_ms = (
+            settings.BROKER_BATCH_LINGER_MS if linger_ms is None else linger_ms
+        )
+        self.stats = BatchStats()
+        self._queue: asyncio.Queue | None = None
+        self._task: asyncio.Task | None = None
+        self._stopping = False
+        self._flushes: set[asyncio.Task] = set()
+        # Last flush holding messages of each queue, the next one waits for it
+        self._tails: dict[tuple[str, str, int | None], asyncio.Task] = {}
+
+    @property
+    def is_running(self) -> bool:
+        """
+        Whether messages can be submitted; False once `stop` was called, so
+        publishers fall back to publishing directly meanwhile.
+        """
+        return self._task is not None and not self._stopping
+
+    def start(self) -> None:
+        """
+        Starts the collecting task on the running event loop.
+        """
+        if self._task is None:
+            self._stopping = False
+            self._queue = asyncio.Queue()
+            self._task = asyncio.create_task(self._collect())
+
+    async def stop(self) -> None:
+        """
+        Flushes every pending message and stops the collecting task.
+        """
+        if self._task is None or self._stopping:
+            return
+
+        self._stopping = True
+        self._queue.put_nowait(None)
+        await self._task
+        if self._flushes:
+            await asyncio.gather(*self._flushes, return_exceptions=True)
+
+        # Nothing is submitted once stopping, but never leave a publisher hanging
+        while not self._queue.empty():
+            item = self._queue.get_nowait()
+            if item is not None and not item[-1].done():
+                item[-1].set_exception(RuntimeError("The publish batcher stopped"))
+        self._task = None
+        self._queue = None
+
+    async def submit(
+        self,
+        event_store: str,
+        routing_key: str,
+        message: Any,
+        partition: int | None = None,
+    ) -> None:
+        """
+        Queues a message for the next batch and waits until it is published.
+
+        Raises `RuntimeError` when the batcher is not running (or stopping).
+        """
+        if not self.is_running:
+            raise RuntimeError("The publish batcher is not running")
+
+        future = asyncio.get_running_loop().create_future()
+        self._queue.put_nowait((event_store, routing_key, partition, message, future))
+        await future
+
+    async def _collect(self) -> None:
+        loop = asyncio.get_running_loop()
+        stopping = False
+
+        while not stopping:
+            item = await self._queue.get()
+            if item is None:
+                break
+
+            batch = [item]
+            started_at = loop.time()
+            deadline = started_at + self.linger_ms / 1000
+
+            while len(batch) < self.max_size:
+                if self._queue.empty():
+                    timeout = deadline - loop.time()
+                    if timeout <= 0:
+                        break
+                    try:
+                        item = await asyncio.wait_for(self._queue.get(), timeout)
+                    except asyncio.TimeoutError:
+                        break
+                else:
+                    item = self._queue.get_nowait()
+
+                if item is None:
+                    stopping = True
+                    break
+                batch.append(item)
+
+            self.stats.record(len(batch), loop.time() - started_at)
+            self._schedule_flush(batch)
+
+    def _schedule_flush(self, batch: list[tuple]) -> None:
+        groups = defaultdict(list)
+        for event_store, routing_key, partition, message, _ in batch:
+            groups[(event_store, routing_key, partition)].append(message)
+
+        previous = {self._tails[key] for key in groups if key in self._tails}
+        flush = asyncio.create_task(self._flush(batch, groups, previous))
+        self._flushes.add(flush)
+        for key in groups:
+            self._tails[key] = flush
+
+        def _done(task: asyncio.Task) -> None:
+            self._flushes.discard(task)
+            for key in groups:
+                if self._tails.get(key) is task:
+                    del self._tails[key]
+
+        flush.add_done_callback(_done)
+
+    async def _flush(
+        self,
+        batch: list[tuple],
+        groups: dict[tuple[str, str, int | None], list[Any]],
+        previous: set[asyncio.Task],
+    ) -> None:
+        if previous:
+            # Published or failed, the earlier messages of these queues go first
+            await asyncio.wait(previous)
+
+        try:
+            await publisher_pool.run(self._publish, groups)
+        except Exception as e:
+            logger.error(f"Failed to publish a batch of {len(batch)} messages: {e}")
+            for *_, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+        else:
+            for *_, future in batch:
+                if not future.done():
+                    future.set_result(None)
+
+    @staticmethod
+    def _publish(groups: dict[tuple[str, str, int | None], list[Any]]) -> None:
+        with publisher_pool.acquire() as client:
+            for (event_store, routing_key, partition), messages in groups.items():
+                client.event_producer_batch(
+                    event_store=event_store,
+                    routing_key=routing_key,
+                    messages=messages,
+                    partition=partition,
+                )
+
+
+publish_batcher = PublishBatcher()
@@ -1,43 +1,79 @@
-import json
 import ssl
 import contextlib
+import threading
 from collections.abc import Generator
 from typing import Any
-from kombu import Connection, Exchange, Queue
+from kombu import Connection
 
+from core.broker.consumer import ConcurrentConsumer
+from core.broker.serializers import encode_message, get_serializer, message_compression
+from core.broker.topology import topology
 from core.config import settings
+from core.metrics import registry
+
+broker_operation_seconds = registry.histogram(
+    "broker_operation_duration_seconds",
+    "Latency of broker client operations (consume: one message callback).",
+    ("operation", "outcome"),
+)
+broker_messages = registry.counter(
+    "broker_messages_total",
+    "Messages published or consumed by broker client operations.",
+    ("operation",),
+)
+
+
+def build_connection() -> Connection:
+    """
+    Builds a (lazy) kombu connection from the broker settings.
+    """
+    transport_options = {"max_retries": settings.BROKER_MAX_RETRIES}
+    if settings.USE_SSL:
+        transport_options["ssl"] = {
+            "ssl_version": ssl.PROTOCOL_TLSv1_2,
+            "cert_reqs": ssl.CERT_REQUIRED,  # Require certificate validation
+        }
+
+    return Connection(
+        hostname=settings.BROKER_HOSTNAME,
+        port=settings.BROKER_PORT,
+        userid=settings.BROKER_USERNAME,
+        password=settings.BROKER_PASSWORD,
+        virtual_host=settings.VIRTUAL_HOST,
+        ssl=settings.USE_SSL,
+        transport_options=transport_options,
+    )
+
+
+def timed_callback(callback):
+    """
+    Wraps a consumer callback to record every message it handles.
+    """
+
+    def _callback(body):
+        with broker_operation_seconds.time("consume"):
+            result = callback(body)
+        broker_messages.inc("consume")
+        return result
+
+    return _callback
 
 
 class BrokerClient:
-    def __init__(self) -> None:
+    def __init__(self, connection: Connection | None = None) -> None:
         """
-        Initializes the AMQP client with the given RabbitMQ URL.
+        Initializes the AMQP client, optionally on top of an already open
+        (e.g. pooled) connection.
         """
+        self.connection = connection
+        self.channel = None
 
     def init(self):
         """
         Initializes the AMQP connection and channel.
         """
         try:
-            transport_options = None
-            if settings.USE_SSL:
-                transport_options = {
-                    "ssl": {
-                        "ssl_version": ssl.PROTOCOL_TLSv1_2,
-                        "cert_reqs": ssl.CERT_REQUIRED,  # Require certificate validation
-                    }
-                }
-
-            self.connection = Connection(
-                hostname=settings.BROKER_HOSTNAME,
-                port=settings.BROKER_PORT,
-                userid=settings.BROKER_USERNAME,
-                password=settings.BROKER_PASSWORD,
-                virtual_host=settings.VIRTUAL_HOST,
-                ssl=settings.USE_SSL,
-                transport_options=transport_options,
-            )
-
+            self.connection = build_connection()
             self.channel = self.connection.channel()
         except Exception as e:
             print(f"Failed to connect to RabbitMQ: {e}")
@@ -45,7 +81,13 @@ class BrokerClient:
             self.channel = None
         return self
 
-    def event_producer(self, event_store: str, routing_key: str, message: Any) -> None:
+    def event_producer(
+        self,
+        event_store: str,
+        routing_key: str,
+        message: Any,
+        partition: int | None = None,
+    ) -> None:
         """
         Send event/message to a specific exchange/queue with routing-key.
 
@@ -53,59 +95,102 @@ class BrokerClient:
         to that queue otherwise the message will be lost.
 
         NOTE: The routing_key is mandatory so we can explicitly route the message/event
-        to the right queue.
+        to the right queue. With partitioned queues, `partition` selects the
+        queue (and the routing key) of the message.
+        """
+        queue, exchange = topology.queue_exchange(event_store, routing_key, partition)
+        serializer = get_serializer()
+
+        with broker_operation_seconds.time("publish"):
+            with self._connection().Producer() as producer:
+                body = encode_message(message, serializer)
+                producer.publish(
+                    body,
+                    exchange=exchange,
+                    routing_key=queue.routing_key,
+                    content_type=serializer.content_type,
+                    content_encoding=serializer.content_encoding,
+                    compression=message_compression(body),
+                    declare=[queue],
+                    retry=True,
+                    retry_policy={"max_retries": settings.BROKER_MAX_RETRIES},
+                )
+        broker_messages.inc("publish")
+
+    def event_producer_batch(
+        self,
+        event_store: str,
+        routing_key: str,
+        messages: list[Any],
+        partition: int | None = None,
+        content_type: str | None = None,
+        content_encoding: str | None = None,
+    ) -> None:
+        """
+        Send several events/messages to the same exchange/queue over one channel.
+
+        Messages encoded earlier (e.g. spooled by the outbox) are bytes sent as
+        they are, labelled with the `content_type` and `content_encoding` they
+        were encoded with; otherwise the configured serializer encodes them.
         """
-        exchange = f"{event_store}_exchange"
-        queue = f"{event_store}_queue"
-
-        queue, exchange = self._set_up_exchange_queue(exchange, queue, routing_key)
-
-        if isinstance(message, dict):
-            message = json.dumps(message)
-
-        with self.connection.Producer() as producer:
-            producer.publish(
-                message,
-                exchange=exchange,
-                routing_key=routing_key,
-                serializer="json",
-                content_type=settings.CONTENT_TYPE,
-                content_encoding=settings.CONTENT_ENCODING,
-                declare=[queue],
-            )
-
-    def event_consumer(self, event_store: str, routing_key: str, callback) -> None:
+        queue, exchange = topology.queue_exchange(event_store, routing_key, partition)
+        if content_type is None:
+            serializer = get_serializer()
+            content_type = serializer.content_type
+            content_encoding = serializer.content_encoding
+            messages = [encode_message(message, serializer) for message in messages]
+
+        with broker_operation_seconds.time("publish_batch"):
+            with self._connection().Producer() as producer:
+                for body in messages:
+                    producer.publish(
+                        body,
+                        exchange=exchange,
+                        routing_key=queue.routing_key,
+                        content_type=content_type,
+                        content_encoding=content_encoding,
+                        compression=message_compression(body),
+                        declare=[queue],
+                        retry=True,
+                        retry_policy={"max_retries": settings.BROKER_MAX_RETRIES},
+                    )
+        broker_messages.inc("publish_batch", amount=len(messages))
+
+    def event_consumer(
+        self,
+        event_store: str,
+        routing_key: str,
+        callback,
+        prefetch_count: int | None = None,
+        workers: int | None = None,
+        stop_event: threading.Event | None = None,
+        partition: int | None = None,
+    ) -> None:
         """
         Consumes messages from a specific queue and processes them using the provided callback.
+
+        Callbacks run on `workers` threads with up to `prefetch_count` messages
+        in flight, and completed messages are acknowledged cumulatively. Runs
+        until `stop_event` is set, then drains the in-flight messages. With
+        partitioned queues, `partition` selects the queue to consume.
         """
-        exchange = f"{event_store}_exchange"
-        queue = f"{event_store}_queue"
-
-        queue, exchange = self._set_up_exchange_queue(exchange, queue, routing_key)
-
-        def _callback(body, message):
-            callback(body)
-            message.ack()
-
-        with self.connection.Consumer(
-            queue, callbacks=[_callback], accept=settings.ACCEPT_CONTENT.split()
-        ) as _:
-            print("Start consuming...")
-            while True:
-                self.connection.drain_events()
-
-    def _set_up_exchange_queue(
-        self, exchange: str, queue: str, routing_key: str
-    ) -> tuple[Queue, Exchange]:
-        exchange = Exchange(
-            exchange,
-            type=settings.EXCHANGE_TYPE,
-            durable=settings.DURABLE,
-        )
-        queue = Queue(
-            queue, exchange, routing_key=routing_key, durable=settings.DURABLE
+        queue, exchange = topology.declare(
+            self._connection().default_channel, event_store, routing_key, partition
         )
-        return queue, exchange
+
+        ConcurrentConsumer(
+            connection=self.connection,
+            queue=queue,
+            callback=timed_callback(callback),
+            prefetch_count=prefetch_count,
+            workers=workers,
+            stop_event=stop_event,
+        ).run()
+
+    def _connection(self) -> Connection:
+        if self.connection is None:
+            raise ConnectionError("Not connected to the broker")
+        return self.connection
 
     def close(self):
         """
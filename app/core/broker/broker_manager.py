@@ -1,5 +1,6 @@
+from collections import defaultdict
 from typing import Any
-from core.broker import AMQPClient
+from core.broker import AMQPClient, outbox, publisher_pool, publish_batcher, topology
 from core.enums import EventStoreTypeEnum, RoutingTypeEnum
 
 
@@ -7,18 +8,113 @@ class BrokerManager:
     def __init__(self, event_store_key: EventStoreTypeEnum):
         self.event_store_key = event_store_key
 
-    def publish_event(self, routing_key: RoutingTypeEnum, message: Any):
-        with AMQPClient() as client:
+    def publish_event(
+        self,
+        routing_key: RoutingTypeEnum,
+        message: Any,
+        partition_key: str | None = None,
+    ):
+        with publisher_pool.acquire() as client:
             client.event_producer(
                 event_store=self.event_store_key.value,
                 routing_key=routing_key.value,
                 message=message,
+                partition=topology.partition(partition_key),
             )
 
-    def consume_event(self, routing_key: RoutingTypeEnum, callback):
+    async def apublish_event(
+        self,
+        routing_key: RoutingTypeEnum,
+        message: Any,
+        partition_key: str | None = None,
+    ):
+        if outbox.is_running:
+            await outbox.append(
+                event_store=self.event_store_key.value,
+                routing_key=routing_key.value,
+                message=message,
+                partition=topology.partition(partition_key),
+            )
+            return
+
+        if publish_batcher.is_running:
+            await publish_batcher.submit(
+                event_store=self.event_store_key.value,
+                routing_key=routing_key.value,
+                message=message,
+                partition=topology.partition(partition_key),
+            )
+            return
+
+        await publisher_pool.run(
+            self.publish_event,
+            routing_key=routing_key,
+            message=message,
+            partition_key=partition_key,
+        )
+
+    def publish_events(
+        self,
+        routing_key: RoutingTypeEnum,
+        messages: list[Any],
+        partition_keys: list[str | None] | None = None,
+    ):
+        with publisher_pool.acquire() as client:
+            for partition, partition_messages in self._partitioned(
+                messages, partition_keys
+            ).items():
+                client.event_producer_batch(
+                    event_store=self.event_store_key.value,
+                    routing_key=routing_key.value,
+                    messages=partition_messages,
+                    partition=partition,
+                )
+
+    async def apublish_events(
+        self,
+        routing_key: RoutingTypeEnum,
+        messages: list[Any],
+        partition_keys: list[str | None] | None = None,
+    ):
+        if outbox.is_running:
+            for partition, partition_messages in self._partitioned(
+                messages, partition_keys
+            ).items():
+                await outbox.append_many(
+                    event_store=self.event_store_key.value,
+                    routing_key=routing_key.value,
+                    messages=partition_messages,
+                    partition=partition,
+                )
+            return
+
+        await publisher_pool.run(
+            self.publish_events,
+            routing_key=routing_key,
+            messages=messages,
+            partition_keys=partition_keys,
+        )
+
+    @staticmethod
+    def _partitioned(
+        messages: list[Any], partition_keys: list[str | None] | None
+    ) -> dict[int | None, list[Any]]:
+        """
+        Groups messages by the partition of their key, keeping their order.
+        """
+        if partition_keys is None:
+            partition_keys = [None] * len(messages)
+
+        partitions = defaultdict(list)
+        for message, partition_key in zip(messages, partition_keys):
+            partitions[topology.partition(partition_key)].append(message)
+        return partitions
+
+    def consume_event(self, routing_key: RoutingTypeEnum, callback, **options):
         with AMQPClient() as client:
             client.event_consumer(
                 event_store=self.event_store_key.value,
                 routing_key=routing_key.value,
                 callback=callback,
+                **options,
             )
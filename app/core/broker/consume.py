@@ -0,0 +1,303 @@
+"""
+Runs broker consumers in several worker processes.
+
+Every process opens its own broker connection(s). By default each process
+consumes every queue (competing consumers); with `--shard` each queue is
+assigned to a single process by consistent hashing. Partitioned event stores
+(`BROKER_PARTITIONS`) contribute one queue per partition, so sharding them
+consumes the partitions in parallel while keeping each one in order. Crashed
+processes are restarted with backoff, and SIGTERM/SIGINT drains the in-flight
+messages of every process before exiting.
+
+    python -m core.broker.consume --callback my.module:handle_signal --processes 4
+"""
+
+import argparse
+import hashlib
+import importlib
+import logging
+import multiprocessing
+import os
+import signal
+import threading
+import time
+from collections.abc import Callable
+from typing import Any, NamedTuple
+
+from core.broker.broker_manager import BrokerManager
+from core.broker.topology import topology
+from core.enums import EventStoreTypeEnum, RoutingTypeEnum
+
+logger = logging.getLogger(__name__)
+
+# Restart backoff of a crashed process, reset once it ran for `STABLE_SECONDS`
+MIN_BACKOFF_SECONDS = 1.0
+MAX_BACKOFF_SECONDS = 30.0
+STABLE_SECONDS = 60.0
+
+
+class ConsumerQueue(NamedTuple):
+    event_store: EventStoreTypeEnum
+    routing_key: RoutingTypeEnum
+    partition: int | None = None
+
+    @property
+    def name(self) -> str:
+        if self.partition is None:
+            return self.event_store.value
+        return f"{self.event_store.value}.p{self.partition:02d}"
+
+
+def consumer_queues(names: list[str] | None = None) -> list[ConsumerQueue]:
+    """
+    Returns the queues (one per partition) of the given event stores (names or
+    values), or of every event store.
+    """
+    event_stores = list(EventStoreTypeEnum)
+    if names:
+        by_name = {e.name: e for e in event_stores} | {e.value: e for e in event_stores}
+        unknown = [name for name in names if name not in by_name]
+        if unknown:
+            raise ValueError(f"Unknown event stores: {', '.join(unknown)}")
+        event_stores = [by_name[name] for name in names]
+
+    return [
+        ConsumerQueue(event_store, RoutingTypeEnum[event_store.name], partition)
+        for event_store in event_stores
+        for partition in topology.partition_range()
+    ]
+
+
+def shard_queues(
+    queues: list[ConsumerQueue], processes: int
+) -> list[list[ConsumerQueue]]:
+    """
+    Assigns every queue to one process by rendezvous (highest random weight)
+    hashing, so changing the number of processes only moves the queues of the
+    added or removed processes.
+    """
+    shards = [[] for _ in range(processes)]
+    for queue in queues:
+        owner = max(range(processes), key=lambda process: _weight(queue, process))
+        shards[owner].append(queue)
+    return shards
+
+
+def _weight(queue: ConsumerQueue, process: int) -> int:
+    digest = hashlib.blake2b(f"{queue.name}:{process}".encode(), digest_size=8)
+    return int.from_bytes(digest.digest(), "big")
+
+
+def load_callback(path: str) -> Callable[[Any], Any]:
+    """
+    Imports a `module:function` callback.
+    """
+    module_name, _, attribute = path.partition(":")
+    if not module_name or not attribute:
+        raise ValueError(f"Callback must look like module:function, got {path!r}")
+    return getattr(importlib.import_module(module_name), attribute)
+
+
+def run_worker(
+    queues: list[ConsumerQueue],
+    callback_path: str,
+    prefetch_count: int | None,
+    workers: int | None,
+) -> None:
+    """
+    Consumes the queues in this process, one connection and thread per queue,
+    until SIGTERM.
+    """
+    logging.basicConfig(level=logging.INFO)
+    callback = load_callback(callback_path)
+
+    stop_event = threading.Event()
+    signal.signal(signal.SIGTERM, lambda *_: stop_event.set())
+    # Ctrl-C reaches the whole process group, the supervisor forwards a SIGTERM
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+
+    errors = []
+
+    def _consume(queue: ConsumerQueue) -> None:
+        try:
+            BrokerManager(event_store_key=queue.event_store).consume_event(
+                routing_key=queue.routing_key,
+                callback=callback,
+                prefetch_count=prefetch_count,
+                workers=workers,
+                stop_event=stop_event,
+                partition=queue.partition,
+            )
+        except Exception as e:
+            logger.error(f"Consumer of {queue.name} failed: {e}")
+            errors.append(e)
+        finally:
+            # One failed queue restarts the whole process
+            stop_event.set()
+
+    threads = [
+        threading.Thread(target=_consume, args=(queue,), name=f"consume-{queue.name}")
+        for queue in queues
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    if errors:
+        raise SystemExit(1)
+
+
+class ConsumerSupervisor:
+    def __init__(
+        self,
+        assignments: list[list[ConsumerQueue]],
+        callback_path: str,
+        prefetch_count: int | None = None,
+        workers: int | None = None,
+        shutdown_timeout: float = 30.0,
+    ) -> None:
+        """
+        Keeps one worker process running per queue assignment.
+        """
+        self.assignments = assignments
+        self.callback_path = callback_path
+        self.prefetch_count = prefetch_count
+        self.workers = workers
+        self.shutdown_timeout = shutdown_timeout
+        self._context = multiprocessing.get_context("spawn")
+        self._processes: dict[int, multiprocessing.Process] = {}
+        self._started_at: dict[int, float] = {}
+        self._backoff: dict[int, float] = {}
+        self._restart_at: dict[int, float] = {}
+        self._stop = threading.Event()
+
+    def run(self) -> None:
+        signal.signal(signal.SIGTERM, lambda *_: self._stop.set())
+        signal.signal(signal.SIGINT, lambda *_: self._stop.set())
+
+        for slot in range(len(self.assignments)):
+            self._start(slot)
+
+        while not self._stop.wait(0.5):
+            now = time.monotonic()
+            for slot, process in list(self._processes.items()):
+                if process.is_alive():
+                    continue
+                if slot not in self._restart_at:
+                    self._schedule_restart(slot, process.exitcode, now)
+                elif now >= self._restart_at[slot]:
+                    self._start(slot)
+
+        self._shutdown()
+
+    def _start(self, slot: int) -> None:
+        queues = self.assignments[slot]
+        process = self._context.Process(
+            target=run_worker,
+            args=(queues, self.callback_path, self.prefetch_count, self.workers),
+            name=f"consumer-{slot}",
+        )
+        process.start()
+        self._processes[slot] = process
+        self._started_at[slot] = time.monotonic()
+        self._restart_at.pop(slot, None)
+        logger.info(
+            f"Started consumer process {slot} (pid {process.pid}) for "
+            f"{', '.join(queue.name for queue in queues)}"
+        )
+
+    def _schedule_restart(self, slot: int, exitcode: int | None, now: float) -> None:
+        if now - self._started_at[slot] >= STABLE_SECONDS:
+            self._backoff[slot] = MIN_BACKOFF_SECONDS
+        else:
+            self._backoff[slot] = min(
+                self._backoff.get(slot, MIN_BACKOFF_SECONDS / 2) * 2,
+                MAX_BACKOFF_SECONDS,
+            )
+        self._restart_at[slot] = now + self._backoff[slot]
+        logger.error(
+            f"Consumer process {slot} exited with code {exitcode}, restarting in "
+            f"{self._backoff[slot]:.0f}s"
+        )
+
+    def _shutdown(self) -> None:
+        logger.info("Stopping consumer processes")
+        for process in self._processes.values():
+            if process.is_alive():
+                process.terminate()
+
+        deadline = time.monotonic() + self.shutdown_timeout
+        for process in self._processes.values():
+            process.join(max(deadline - time.monotonic(), 0))
+            if process.is_alive():
+                logger.error(f"Killing consumer process {process.pid}")
+                process.kill()
+                process.join()
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(
+        prog="python -m core.broker.consume", description=__doc__.split("\n\n")[0]
+    )
+    parser.add_argument(
+        "--callback",
+        required=True,
+        help="module:function called with the body of every message",
+    )
+    parser.add_argument(
+        "--queue",
+        action="append",
+        dest="queues",
+        help="event store to consume (repeatable), every event store by default",
+    )
+    parser.add_argument(
+        "--processes",
+        type=int,
+        default=os.cpu_count() or 1,
+        help="number of worker processes (default: number of CPUs)",
+    )
+    parser.add_argument(
+        "--shard",
+        action="store_true",
+        help="consume every queue (partition) in a single process instead of in all "
+        "of them, required to keep partitions in order",
+    )
+    parser.add_argument("--prefetch", type=int, help="prefetch count per consumer")
+    parser.add_argument("--workers", type=int, help="callback threads per consumer")
+    parser.add_argument(
+        "--shutdown-timeout",
+        type=float,
+        default=30.0,
+        help="seconds to wait for in-flight messages on shutdown",
+    )
+    args = parser.parse_args(argv)
+
+    if args.processes < 1:
+        parser.error("--processes must be at least 1")
+
+    logging.basicConfig(level=logging.INFO)
+    try:
+        queues = consumer_queues(args.queues)
+        load_callback(args.callback)
+    except (ValueError, ImportError, AttributeError) as e:
+        parser.error(str(e))
+
+    if args.shard:
+        assignments = [
+            shard for shard in shard_queues(queues, args.processes) if shard
+        ]
+    else:
+        assignments = [queues] * args.processes
+
+    ConsumerSupervisor(
+        assignments,
+        callback_path=args.callback,
+        prefetch_count=args.prefetch,
+        workers=args.workers,
+        shutdown_timeout=args.shutdown_timeout,
+    ).run()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,239 @@
+import logging
+import socket
+import threading
+from collections import OrderedDict
+from collections.abc import Callable
+from concurrent.futures import ThreadPoolExecutor
+from queue import Empty, SimpleQueue
+from typing import Any
+
+from kombu import Connection, Producer, Queue
+from kombu.message import Message
+from kombu.transport import virtual
+
+from core.config import settings
+
+logger = logging.getLogger(__name__)
+
+# How long the connection thread waits for deliveries (or, with a full prefetch
+# window, completions) before settling what has completed so far
+POLL_TIMEOUT_SECONDS = 0.05
+# Times a message was republished after its callback failed
+RETRIES_HEADER = "x-retries"
+
+
+class AckTracker:
+    def __init__(self, multiple: bool = True, max_retries: int | None = None) -> None:
+        """
+        Settles delivered messages in delivery order.
+
+        Completed messages are acknowledged once every message delivered before
+        them is settled too, with a single cumulative `multiple=True` ack when
+        the transport supports it (AMQP), one ack per message otherwise (kombu's
+        virtual transports ignore `multiple`). Must only be used from the
+        connection's thread.
+
+        Failed messages are settled right away: republished to the tail of
+        their queue with their retry count in the x-retries header, then acked
+        (or requeued if that fails). After `max_retries` retries, they are
+        rejected without requeue, so the broker dead-letters them when the
+        queue has a dead-letter exchange and a poison message cannot spin.
+        """
+        self.multiple = multiple
+        self.max_retries = (
+            settings.CONSUMER_MAX_RETRIES if max_retries is None else max_retries
+        )
+        self.acked = 0
+        self.retried = 0
+        self.dead_lettered = 0
+        # delivery tag -> [message, completed]
+        self._pending: OrderedDict[Any, list] = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._pending)
+
+    def delivered(self, message: Message) -> None:
+        self._pending[message.delivery_tag] = [message, False]
+
+    def completed(self, message: Message, succeeded: bool) -> None:
+        if succeeded:
+            self._pending[message.delivery_tag][1] = True
+            return
+
+        del self._pending[message.delivery_tag]
+        retries = int(message.headers.get(RETRIES_HEADER, 0))
+        if retries >= self.max_retries:
+            logger.error(
+                f"Rejecting message after {retries} retries "
+                f"(routing key {message.delivery_info.get('routing_key')})"
+            )
+            message.reject(requeue=False)
+            self.dead_lettered += 1
+            return
+
+        try:
+            self._republish(message, retries + 1)
+        except Exception as e:
+            logger.error(f"Failed to republish message for a retry: {e}")
+            message.reject(requeue=True)
+        else:
+            message.ack()
+        self.retried += 1
+
+    @staticmethod
+    def _republish(message: Message, retries: int) -> None:
+        # The body is republished as received: still serialized and compressed
+        Producer(message.channel).publish(
+            message.body,
+            exchange=message.delivery_info.get("exchange", ""),
+            routing_key=message.delivery_info.get("routing_key", ""),
+            headers={**message.headers, RETRIES_HEADER: retries},
+            content_type=message.content_type,
+            content_encoding=message.content_encoding,
+            delivery_mode=message.properties.get("delivery_mode"),
+        )
+
+    def flush(self) -> None:
+        """
+        Acknowledges the completed messages at the head of the delivery order.
+        """
+        settled = []
+        while self._pending:
+            message, completed = next(iter(self._pending.values()))
+            if not completed:
+                break
+            self._pending.popitem(last=False)
+            settled.append(message)
+
+        if not settled:
+            return
+        if self.multiple:
+            settled[-1].ack(multiple=True)
+        else:
+            for message in settled:
+                message.ack()
+        self.acked += len(settled)
+
+
+class ConcurrentConsumer:
+    def __init__(
+        self,
+        connection: Connection,
+        queue: Queue,
+        callback: Callable[[Any], Any],
+        prefetch_count: int | None = None,
+        workers: int | None = None,
+        stop_event: threading.Event | None = None,
+        max_retries: int | None = None,
+    ) -> None:
+        """
+        Consumes a queue running the callback on a pool of worker threads.
+
+        Up to `prefetch_count` unacknowledged messages are delivered at once
+        (basic.qos) and handed to `workers` threads; with a single worker the
+        callbacks run in delivery order. Completions come back to the connection
+        thread, which alone talks to the broker, and are settled by an
+        `AckTracker`, which retries failed messages up to `max_retries` times.
+        Once `stop_event` is set the consumer is cancelled, the in-flight
+        messages are drained and settled, and `run` returns.
+        """
+        self.connection = connection
+        self.queue = queue
+        self.callback = callback
+        self.workers = workers or settings.CONSUMER_WORKERS
+        self.prefetch_count = max(
+            prefetch_count or settings.CONSUMER_PREFETCH_COUNT, self.workers
+        )
+        self.stop_event = stop_event or threading.Event()
+        self.max_retries = max_retries
+        self._completions: SimpleQueue = SimpleQueue()
+
+    def run(self) -> None:
+        channel = self.connection.default_channel
+        tracker = AckTracker(
+            multiple=not isinstance(channel, virtual.Channel),
+            max_retries=self.max_retries,
+        )
+
+        if self.workers > 1:
+            executor = ThreadPoolExecutor(
+                max_workers=self.workers, thread_name_prefix="consumer"
+            )
+
+            def _deliver(body, message):
+                tracker.delivered(message)
+                future = executor.submit(self.callback, body)
+                future.add_done_callback(
+                    lambda f: self._completions.put((message, f.exception()))
+                )
+
+        else:
+            # A single worker runs on the connection thread, sparing the handoff
+            executor = None
+
+            def _deliver(body, message):
+                tracker.delivered(message)
+                try:
+                    self.callback(body)
+                except Exception as e:
+                    self._completions.put((message, e))
+                else:
+                    tracker.completed(message, succeeded=True)
+
+        try:
+            with self.connection.Consumer(
+                self.queue,
+                callbacks=[_deliver],
+                # The content type we publish is always accepted
+                accept={*settings.ACCEPT_CONTENT.split(), settings.CONTENT_TYPE},
+                prefetch_count=self.prefetch_count,
+            ) as consumer:
+                logger.info(
+                    f"Start consuming {self.queue.name} "
+                    f"(prefetch={self.prefetch_count}, workers={self.workers})"
+                )
+                while not self.stop_event.is_set():
+                    if len(tracker) < self.prefetch_count:
+                        self._drain()
+                        self._settle(tracker)
+                    else:
+                        self._settle(tracker, block=True)
+
+                # Deliveries still buffered after the cancel are never handed
+                # out, the broker requeues them once the channel closes
+                consumer.cancel()
+                while len(tracker):
+                    self._settle(tracker, block=True)
+        finally:
+            if executor is not None:
+                executor.shutdown(wait=True)
+
+        logger.info(
+            f"Stopped consuming {self.queue.name} "
+            f"(acked={tracker.acked}, retried={tracker.retried}, "
+            f"dead_lettered={tracker.dead_lettered})"
+        )
+
+    def _drain(self) -> None:
+        try:
+            self.connection.drain_events(timeout=POLL_TIMEOUT_SECONDS)
+        except socket.timeout:
+            pass
+
+    def _settle(self, tracker: AckTracker, block: bool = False) -> None:
+        """
+        Settles the completed messages, waiting for a first one if `block`.
+        """
+        timeout = POLL_TIMEOUT_SECONDS if block else None
+        while True:
+            try:
+                message, error = self._completions.get(block=block, timeout=timeout)
+            except Empty:
+                break
+            block = False
+            if error is not None:
+                logger.error(
+                    f"Failed to process message from {self.queue.name}: {error}"
+                )
+            tracker.completed(message, succeeded=error is None)
+        tracker.flush()
@@ -0,0 +1,635 @@
+import asyncio
+import fcntl
+import logging
+import mmap
+import os
+import struct
+import threading
+import time
+import uuid
+import zlib
+from collections import defaultdict
+from typing import Any
+
+from kombu.exceptions import OperationalError
+
+from core.broker.pool import publisher_pool
+from core.broker.serializers import encode_message, get_serializer
+from core.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Every record is its body length and CRC32 followed by the body, a zero length
+# marks the end of the records written to a (zero-filled) segment. Bodies are
+# the NUL-separated event store, routing key, partition and the content type and
+# encoding the message was serialized with, then the message.
+RECORD_HEADER = struct.Struct("<II")
+# Segment sequence number and offset of the next record to publish
+CURSOR = struct.Struct("<QQ")
+SEGMENT_SUFFIX = ".log"
+CURSOR_FILE = "cursor"
+# Held (flock) by the process owning a log directory for as long as it runs
+LOCK_FILE = "lock"
+# Records that could not be published, shared by every process (in OUTBOX_DIR)
+DEAD_LETTER_FILE = "dead-letters"
+# Publish errors of a broker outage, retried until the broker is back
+OUTAGE_ERRORS = (OperationalError, OSError)
+
+
+def _resolve(future: asyncio.Future) -> None:
+    if not future.done():
+        future.set_result(None)
+
+
+def _segment_file(directory: str, seq: int) -> str:
+    return os.path.join(directory, f"{seq:020d}{SEGMENT_SUFFIX}")
+
+
+def _segment_seqs(directory: str) -> list[int]:
+    return sorted(
+        int(name[: -len(SEGMENT_SUFFIX)])
+        for name in os.listdir(directory)
+        if name.endswith(SEGMENT_SUFFIX)
+    )
+
+
+def _load_cursor(directory: str) -> tuple[int, int] | None:
+    try:
+        with open(os.path.join(directory, CURSOR_FILE), "rb") as f:
+            return CURSOR.unpack(f.read(CURSOR.size))
+    except (OSError, struct.error):
+        return None
+
+
+def _fsync_directory(directory: str) -> None:
+    """
+    Makes the entries created, renamed or removed in a directory durable.
+    """
+    fd = os.open(directory, os.O_RDONLY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+def _lock_directory(directory: str) -> int | None:
+    """
+    Locks a log directory, returns the lock file descriptor or None when another
+    process holds it (or removed the directory meanwhile).
+    """
+    path = os.path.join(directory, LOCK_FILE)
+    try:
+        fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o644)
+    except OSError:
+        return None
+
+    try:
+        fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        # The lock file may have been unlinked by whoever adopted the directory
+        # between our open and flock, then we hold a lock nobody else checks
+        if os.fstat(fd).st_ino != os.stat(path).st_ino:
+            raise FileNotFoundError(path)
+    except OSError:
+        os.close(fd)
+        return None
+    return fd
+
+
+def _remove_directory(directory: str) -> None:
+    """
+    Removes a log directory whose lock is held, the lock file last.
+    """
+    for name in os.listdir(directory):
+        if name != LOCK_FILE:
+            os.unlink(os.path.join(directory, name))
+    os.unlink(os.path.join(directory, LOCK_FILE))
+    try:
+        os.rmdir(directory)
+    except OSError:
+        # Someone recreated the lock file to adopt it, they will remove it
+        pass
+
+
+class OutboxSegment:
+    def __init__(self, path: str, seq: int, size: int) -> None:
+        """
+        One preallocated, memory-mapped file of the outbox log.
+
+        Existing segments keep their own size, new ones are `size` bytes long.
+        """
+        self.path = path
+        self.seq = seq
+        self.write_offset = 0
+
+        fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o644)
+        try:
+            if os.fstat(fd).st_size == 0:
+                os.ftruncate(fd, size)
+            self.size = os.fstat(fd).st_size
+            self.mmap = mmap.mmap(fd, self.size)
+        finally:
+            os.close(fd)
+
+    def write(self, body: bytes) -> int | None:
+        """
+        Appends a record, returns the offset after it or None when it does not fit.
+        """
+        start = self.write_offset + RECORD_HEADER.size
+        end = start + len(body)
+        if end > self.size:
+            return None
+
+        RECORD_HEADER.pack_into(
+            self.mmap, self.write_offset, len(body), zlib.crc32(body)
+        )
+        self.mmap[start:end] = body
+        self.write_offset = end
+        return end
+
+    def read(self, offset: int) -> tuple[bytes, int] | None:
+        """
+        Returns the record at the offset and the offset after it, or None at the
+        end of the segment (including a record torn by a crash).
+        """
+        if offset + RECORD_HEADER.size > self.size:
+            return None
+
+        length, crc = RECORD_HEADER.unpack_from(self.mmap, offset)
+        start = offset + RECORD_HEADER.size
+        end = start + length
+        if length == 0 or end > self.size:
+            return None
+
+        body = self.mmap[start:end]
+        if zlib.crc32(body) != crc:
+            return None
+        return body, end
+
+    def flush(self) -> None:
+        self.mmap.flush()
+
+    def close(self) -> None:
+        self.mmap.close()
+
+
+class Outbox:
+    def __init__(
+        self,
+        directory: str | None = None,
+        segment_bytes: int | None = None,
+        fsync_interval_ms: int | None = None,
+        drain_batch_size: int | None = None,
+        max_publish_attempts: int | None = None,
+    ) -> None:
+        """
+        Durable local spool between the webhooks and the broker.
+
+        Messages are appended to a segmented, memory-mapped log and acknowledged
+        once they are on disk. Appends arriving while an fsync runs share the
+        next one (group commit), optionally delayed by `fsync_interval_ms` to
+        gather more of them. A drainer thread publishes the log in order over
+        the publisher pool, persists its cursor and deletes published segments,
+        retrying with backoff while the broker is unavailable. Whatever is left
+        in the log, e.g. after an outage or a restart, is replayed on start.
+
+        A batch failing for another reason than an outage (e.g. a record that
+        does not parse or that the broker refuses) is retried
+        `max_publish_attempts` times, then its records are published one by
+        one and those that still fail are appended to the dead-letter file, so
+        one bad record cannot hold back the log.
+
+        Every process keeps its log in its own subdirectory of `directory`,
+        locked with flock while it runs, so several workers can share the
+        directory. On start, the logs of processes that are gone (whose lock
+        is free) are adopted: their unpublished records are copied to the new
+        log, then their directory is removed.
+        """
+        self.root = directory or settings.OUTBOX_DIR
+        # Subdirectory of the log of this process, while it runs
+        self.directory: str | None = None
+        self.segment_bytes = segment_bytes or settings.OUTBOX_SEGMENT_BYTES
+        self.fsync_interval = (
+            settings.OUTBOX_FSYNC_INTERVAL_MS
+            if fsync_interval_ms is None
+            else fsync_interval_ms
+        ) / 1000
+        self.drain_batch_size = drain_batch_size or settings.OUTBOX_DRAIN_BATCH_SIZE
+        self.max_publish_attempts = (
+            max_publish_attempts or settings.OUTBOX_MAX_PUBLISH_ATTEMPTS
+        )
+        self.appended = 0
+        self.adopted = 0
+        self.published = 0
+        self.publish_failures = 0
+        self.dead_lettered = 0
+        self.fsyncs = 0
+        self._segments: dict[int, OutboxSegment] = {}
+        self._active: OutboxSegment | None = None
+        # (segment, offset) positions: after the last appended record, after the
+        # last record on disk and of the next record to publish
+        self._written = (0, 0)
+        self._synced = (0, 0)
+        self._cursor = (0, 0)
+        self._waiters: list[tuple[tuple[int, int], Any, asyncio.Future]] = []
+        self._lock = threading.Lock()
+        self._appended = threading.Condition(self._lock)
+        self._durable = threading.Condition(self._lock)
+        self._stop = threading.Event()
+        self._threads: list[threading.Thread] = []
+        self._lock_fd: int | None = None
+
+    @property
+    def is_running(self) -> bool:
+        return bool(self._threads)
+
+    def start(self) -> None:
+        """
+        Opens a new log, adopting the logs that other processes left behind, and
+        starts the fsync and drainer threads.
+        """
+        if self._threads:
+            return
+
+        os.makedirs(self.root, exist_ok=True)
+        self._open()
+        self._adopt_orphans()
+        self._stop.clear()
+        self._threads = [
+            threading.Thread(target=self._sync_loop, name="outbox-fsync", daemon=True),
+            threading.Thread(target=self._drain_loop, name="outbox-drain", daemon=True),
+        ]
+        for thread in self._threads:
+            thread.start()
+
+    def stop(self) -> None:
+        """
+        Syncs every appended message and stops the threads.
+
+        Messages that were not published yet stay in the log for the next start
+        (of any process), otherwise the log directory is removed.
+        """
+        if not self._threads:
+            return
+
+        self._stop.set()
+        with self._lock:
+            self._appended.notify_all()
+            self._durable.notify_all()
+        for thread in self._threads:
+            thread.join()
+        self._threads = []
+
+        drained = self._cursor == self._written
+        for segment in self._segments.values():
+            segment.close()
+        self._segments.clear()
+        self._active = None
+
+        if drained:
+            _remove_directory(self.directory)
+        os.close(self._lock_fd)
+        self._lock_fd = None
+        self.directory = None
+
+    async def append(
+        self,
+        event_store: str,
+        routing_key: str,
+        message: Any,
+        partition: int | None = None,
+    ) -> None:
+        """
+        Appends a message to the log and waits until it is on disk.
+        """
+        await self.append_many(event_store, routing_key, [message], partition)
+
+    async def append_many(
+        self,
+        event_store: str,
+        routing_key: str,
+        messages: list[Any],
+        partition: int | None = None,
+    ) -> None:
+        """
+        Appends several messages to the log and waits until they are on disk.
+        """
+        partition = "" if partition is None else partition
+        serializer = get_serializer()
+        prefix = (
+            f"{event_store}\x00{routing_key}\x00{partition}\x00"
+            f"{serializer.content_type}\x00{serializer.content_encoding}\x00"
+        ).encode()
+        position = self._write(
+            [prefix + encode_message(m, serializer) for m in messages]
+        )
+
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        with self._lock:
+            if position <= self._synced:
+                return
+            self._waiters.append((position, loop, future))
+        await future
+
+    def stats(self) -> dict:
+        return {
+            "appended": self.appended,
+            "adopted": self.adopted,
+            "published": self.published,
+            "publish_failures": self.publish_failures,
+            "dead_lettered": self.dead_lettered,
+            "fsyncs": self.fsyncs,
+            "segments": len(self._segments),
+        }
+
+    def _segment_path(self, seq: int) -> str:
+        return _segment_file(self.directory, seq)
+
+    def _open(self) -> None:
+        """
+        Creates and locks the log directory of this process, with its first segment.
+        """
+        name = uuid.uuid4().hex
+        # Locked under a hidden name, so nobody takes it for an orphan meanwhile
+        staging = os.path.join(self.root, f".{name}")
+        os.mkdir(staging)
+        self._lock_fd = _lock_directory(staging)
+        self.directory = os.path.join(self.root, name)
+        os.rename(staging, self.directory)
+        _fsync_directory(self.root)
+
+        self._active = OutboxSegment(self._segment_path(1), 1, self.segment_bytes)
+        self._segments[1] = self._active
+        _fsync_directory(self.directory)
+        self._written = self._synced = self._cursor = (1, 0)
+
+    def _adopt_orphans(self) -> None:
+        """
+        Copies the unpublished records of unlocked log directories to this log
+        and removes them once the copies are on disk.
+        """
+        for name in sorted(os.listdir(self.root)):
+            directory = os.path.join(self.root, name)
+            if (
+                name.startswith(".")
+                or directory == self.directory
+                or not os.path.isdir(directory)
+            ):
+                continue
+
+            fd = _lock_directory(directory)
+            if fd is None:
+                continue
+            try:
+                records = self._replay(directory)
+                for segment in self._segments.values():
+                    segment.flush()
+                _fsync_directory(self.directory)
+                self._synced = self._written
+                _remove_directory(directory)
+            finally:
+                os.close(fd)
+
+            if records:
+                self.adopted += records
+                logger.info(f"Replaying {records} outbox messages of {directory}")
+
+    def _replay(self, directory: str) -> int:
+        """
+        Appends the records of a log from its cursor on, returns their count.
+        """
+        seqs = _segment_seqs(directory)
+        cursor = _load_cursor(directory)
+        if cursor is None or cursor[0] not in seqs:
+            cursor = (seqs[0], 0) if seqs else (0, 0)
+
+        records = 0
+        for seq in seqs:
+            if seq < cursor[0]:
+                continue
+            segment = OutboxSegment(
+                _segment_file(directory, seq), seq, self.segment_bytes
+            )
+            try:
+                offset = cursor[1] if seq == cursor[0] else 0
+                # Stops at the end of the segment, or at a record torn by a crash
+                while (record := segment.read(offset)) is not None:
+                    body, offset = record
+                    self._write([body])
+                    records += 1
+            finally:
+                segment.close()
+        return records
+
+    def _save_cursor(self, cursor: tuple[int, int]) -> None:
+        path = os.path.join(self.directory, CURSOR_FILE)
+        with open(f"{path}.tmp", "wb") as f:
+            f.write(CURSOR.pack(*cursor))
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(f"{path}.tmp", path)
+        _fsync_directory(self.directory)
+
+    def _write(self, bodies: list[bytes]) -> tuple[int, int]:
+        max_body = self.segment_bytes - RECORD_HEADER.size
+        if any(len(body) > max_body for body in bodies):
+            raise ValueError(f"Outbox records are limited to {max_body} bytes")
+
+        with self._lock:
+            for body in bodies:
+                end = self._active.write(body)
+                if end is None:
+                    seq = self._active.seq + 1
+                    self._active = OutboxSegment(
+                        self._segment_path(seq), seq, self.segment_bytes
+                    )
+                    self._segments[seq] = self._active
+                    end = self._active.write(body)
+                self._written = (self._active.seq, end)
+            self.appended += len(bodies)
+            self._appended.notify()
+            return self._written
+
+    def _sync_loop(self) -> None:
+        while True:
+            with self._lock:
+                while self._written == self._synced and not self._stop.is_set():
+                    self._appended.wait()
+                if self._written == self._synced:
+                    return
+
+            if self.fsync_interval:
+                time.sleep(self.fsync_interval)
+
+            with self._lock:
+                target = self._written
+                segments = [
+                    segment
+                    for seq, segment in self._segments.items()
+                    if self._synced[0] <= seq <= target[0]
+                ]
+            for segment in segments:
+                segment.flush()
+            if target[0] != self._synced[0]:
+                # The segments created since the last sync must outlive a crash too
+                _fsync_directory(self.directory)
+
+            with self._lock:
+                self._synced = target
+                self.fsyncs += 1
+                waiters = [waiter for waiter in self._waiters if waiter[0] <= target]
+                self._waiters = [
+                    waiter for waiter in self._waiters if waiter[0] > target
+                ]
+                self._durable.notify_all()
+            for _, loop, future in waiters:
+                loop.call_soon_threadsafe(_resolve, future)
+
+    def _drain_loop(self) -> None:
+        backoff = 1.0
+        # Failed attempts to publish the records at the cursor, outages aside
+        attempts = 0
+        while not self._stop.is_set():
+            records, cursor, synced = self._read(self.drain_batch_size)
+            if not records:
+                if cursor != self._cursor:
+                    self._advance(cursor)
+                    continue
+                with self._lock:
+                    if self._synced == synced and not self._stop.is_set():
+                        self._durable.wait(timeout=1.0)
+                continue
+
+            try:
+                if attempts < self.max_publish_attempts:
+                    self._publish(records)
+                    dead_lettered = 0
+                else:
+                    dead_lettered = self._publish_or_dead_letter(records)
+            except Exception as e:
+                self.publish_failures += 1
+                if not isinstance(e, OUTAGE_ERRORS):
+                    attempts += 1
+                logger.error(f"Failed to drain {len(records)} outbox messages: {e}")
+                self._stop.wait(backoff)
+                backoff = min(backoff * 2, 30.0)
+                continue
+
+            backoff = 1.0
+            attempts = 0
+            self.published += len(records) - dead_lettered
+            self._advance(cursor)
+
+    def _publish_or_dead_letter(self, records: list[bytes]) -> int:
+        """
+        Publishes the records one by one, dead-lettering those that fail for
+        another reason than an outage. Returns the number dead-lettered.
+        """
+        dead_lettered = 0
+        for record in records:
+            try:
+                self._publish([record])
+            except OUTAGE_ERRORS:
+                raise
+            except Exception as e:
+                self._dead_letter(record)
+                dead_lettered += 1
+                logger.error(f"Moved an outbox message to the dead letters: {e}")
+        return dead_lettered
+
+    def _dead_letter(self, record: bytes) -> None:
+        """
+        Appends a record to the dead-letter file, in the segment record format.
+        """
+        path = os.path.join(self.root, DEAD_LETTER_FILE)
+        fd = os.open(path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+        try:
+            os.write(fd, RECORD_HEADER.pack(len(record), zlib.crc32(record)) + record)
+            os.fsync(fd)
+        finally:
+            os.close(fd)
+        _fsync_directory(self.root)
+        self.dead_lettered += 1
+
+    def _read(
+        self, limit: int
+    ) -> tuple[list[bytes], tuple[int, int], tuple[int, int]]:
+        """
+        Returns up to `limit` records on disk from the cursor on, the position
+        after them and the synced position they were read against.
+        """
+        with self._lock:
+            synced = self._synced
+        seq, offset = self._cursor
+
+        records = []
+        while len(records) < limit:
+            if (seq, offset) >= synced:
+                break
+
+            record = self._segments[seq].read(offset)
+            if record is None:
+                if seq >= synced[0]:
+                    break
+                # End of a sealed segment, continue with the next one
+                with self._lock:
+                    seq = min(s for s in self._segments if s > seq)
+                offset = 0
+                continue
+
+            body, offset = record
+            records.append(body)
+
+        return records, (seq, offset), synced
+
+    def _advance(self, cursor: tuple[int, int]) -> None:
+        with self._lock:
+            self._cursor = cursor
+            drained = [
+                self._segments.pop(seq)
+                for seq in list(self._segments)
+                if seq < cursor[0]
+            ]
+        self._save_cursor(cursor)
+
+        for segment in drained:
+            segment.close()
+            os.unlink(segment.path)
+
+    @staticmethod
+    def _publish(records: list[bytes]) -> None:
+        groups = defaultdict(list)
+        for record in records:
+            *fields, message = record.split(b"\x00", 5)
+            event_store, routing_key, partition, content_type, content_encoding = (
+                field.decode() for field in fields
+            )
+            key = (
+                event_store,
+                routing_key,
+                int(partition) if partition else None,
+                content_type,
+                content_encoding,
+            )
+            groups[key].append(message)
+
+        with publisher_pool.acquire() as client:
+            for (
+                event_store,
+                routing_key,
+                partition,
+                content_type,
+                content_encoding,
+            ), messages in groups.items():
+                # Labelled as encoded, whatever the serializer configured now
+                client.event_producer_batch(
+                    event_store=event_store,
+                    routing_key=routing_key,
+                    messages=messages,
+                    partition=partition,
+                    content_type=content_type,
+                    content_encoding=content_encoding,
+                )
+
+
+outbox = Outbox()
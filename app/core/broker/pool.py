@@ -0,0 +1,127 @@
+import asyncio
+import contextlib
+import functools
+import logging
+import threading
+from collections.abc import Callable, Generator
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any
+
+from kombu.connection import ConnectionPool
+
+from core.broker.broker import BrokerClient, build_connection
+from core.broker.topology import topology
+from core.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+class PublisherPool:
+    def __init__(self, limit: int | None = None) -> None:
+        """
+        Process-wide pool of warm broker connections used for publishing.
+
+        Every pooled connection keeps its default channel open between checkouts,
+        so publishing does not pay the TCP/AMQP (and TLS) handshake per message.
+        Blocking broker I/O for async callers runs on the pool's own threads,
+        one per connection, so it never stalls the event loop.
+        """
+        self.limit = limit or settings.BROKER_POOL_LIMIT
+        self._pool: ConnectionPool | None = None
+        self._executor: ThreadPoolExecutor | None = None
+        self._lock = threading.Lock()
+
+    def start(self) -> None:
+        """
+        Creates the pool and opens its connections up front.
+        """
+        with self._lock:
+            if self._pool is not None:
+                return
+            self._pool = build_connection().Pool(limit=self.limit)
+            self._executor = ThreadPoolExecutor(
+                max_workers=self.limit, thread_name_prefix="broker-io"
+            )
+        self.warm_up()
+
+    def warm_up(self) -> None:
+        """
+        Connects every pooled connection, opens its default channel and declares
+        the broker topology on it.
+
+        A broker that is down at startup is only logged, pooled connections
+        reconnect lazily on their next checkout.
+        """
+        connections = []
+        try:
+            for _ in range(self.limit):
+                connection = self._pool.acquire(
+                    block=True, timeout=settings.BROKER_POOL_TIMEOUT
+                )
+                connections.append(connection)
+                topology.declare_all(connection.default_channel)
+        except Exception as e:
+            logger.error(f"Failed to warm up the broker connection pool: {e}")
+        finally:
+            for connection in connections:
+                connection.release()
+
+    @contextlib.contextmanager
+    def acquire(self) -> Generator[BrokerClient, None, None]:
+        """
+        Checks out a pooled connection wrapped in a `BrokerClient`.
+
+        Connections that fail with a connection/channel error are reset before
+        going back to the pool, so the next checkout reconnects.
+        """
+        if self._pool is None:
+            self.start()
+
+        connection = self._pool.acquire(
+            block=True, timeout=settings.BROKER_POOL_TIMEOUT
+        )
+        try:
+            yield BrokerClient(connection=connection)
+        except (connection.connection_errors + connection.channel_errors):
+            connection.collect()
+            raise
+        finally:
+            connection.release()
+
+    async def run(self, func: Callable[..., Any], *args, **kwargs) -> Any:
+        """
+        Runs a blocking broker call on the pool's I/O threads and awaits its result.
+        """
+        if self._executor is None:
+            self.start()
+
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(
+            self._executor, functools.partial(func, *args, **kwargs)
+        )
+
+    async def ping(self) -> None:
+        """
+        Checks that a pooled connection reaches the broker, raising if not.
+        """
+        await self.run(self._ping)
+
+    def _ping(self) -> None:
+        with self.acquire() as client:
+            client.connection.ensure_connection(max_retries=0)
+            client.connection.default_channel
+
+    def close(self) -> None:
+        """
+        Waits for pending broker calls and closes every pooled connection.
+        """
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=True)
+                self._executor = None
+            if self._pool is not None:
+                self._pool.force_close_all()
+                self._pool = None
+
+
+publisher_pool = PublisherPool()
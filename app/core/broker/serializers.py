@@ -0,0 +1,126 @@
+from collections.abc import Callable
+from typing import Any, NamedTuple
+
+import msgpack
+import orjson
+from kombu.compression import get_encoder
+from kombu.serialization import register
+
+from core.config import settings
+
+
+class Serializer(NamedTuple):
+    name: str
+    content_type: str
+    content_encoding: str
+    dumps: Callable[[Any], bytes]
+    loads: Callable[[bytes | str], Any]
+
+
+_serializers: dict[str, Serializer] = {}
+
+
+def register_serializer(serializer: Serializer) -> None:
+    """
+    Registers a serializer for its content type.
+
+    It is registered with kombu as well, so consumers in this process decode
+    the content type with the same serializer.
+    """
+    _serializers[serializer.content_type] = serializer
+    register(
+        serializer.name,
+        serializer.dumps,
+        serializer.loads,
+        content_type=serializer.content_type,
+        content_encoding=serializer.content_encoding,
+    )
+
+
+def get_serializer(content_type: str | None = None) -> Serializer:
+    """
+    Returns the serializer of a content type, `settings.CONTENT_TYPE` by default.
+    """
+    content_type = content_type or settings.CONTENT_TYPE
+    try:
+        return _serializers[content_type]
+    except KeyError:
+        raise ValueError(f"No serializer registered for '{content_type}'.")
+
+
+def validate_serialization_settings() -> None:
+    """
+    Checks that `settings.CONTENT_TYPE` has a registered serializer and that
+    `settings.BROKER_COMPRESSION` is a compression method kombu supports here.
+
+    Raises `ValueError` otherwise, so a bad setting fails the start instead
+    of every publish.
+    """
+    get_serializer()
+    if settings.BROKER_COMPRESSION is not None:
+        try:
+            get_encoder(settings.BROKER_COMPRESSION)
+        except KeyError:
+            raise ValueError(
+                f"Unsupported BROKER_COMPRESSION '{settings.BROKER_COMPRESSION}'."
+            )
+
+
+def encode_message(message: Any, serializer: Serializer | None = None) -> bytes:
+    """
+    Encodes a message once, straight to bytes, with `serializer` (the configured
+    one by default).
+
+    Already encoded messages are sent as they are: bytes, and str in the text
+    encoding of the serializer. Raises `ValueError` for str messages with a
+    binary serializer, which could not decode them as text.
+    """
+    serializer = serializer or get_serializer()
+    if isinstance(message, bytes):
+        return message
+    if isinstance(message, str):
+        if serializer.content_encoding == "binary":
+            raise ValueError(
+                f"str messages cannot be sent as {serializer.content_type}, "
+                "pass the object to serialize instead."
+            )
+        return message.encode(serializer.content_encoding)
+    return serializer.dumps(message)
+
+
+def message_compression(body: bytes) -> str | None:
+    """
+    Returns the kombu compression method (e.g. zlib or zstd) of an encoded
+    message: `settings.BROKER_COMPRESSION` for bodies of at least
+    `settings.BROKER_COMPRESSION_THRESHOLD` bytes, where it pays off, else None.
+
+    Consumers decompress transparently, whatever the method of each message.
+    """
+    if (
+        settings.BROKER_COMPRESSION is None
+        or len(body) < settings.BROKER_COMPRESSION_THRESHOLD
+    ):
+        return None
+    return settings.BROKER_COMPRESSION
+
+
+register_serializer(
+    Serializer(
+        name="orjson",
+        content_type="application/json",
+        content_encoding=settings.CONTENT_ENCODING,
+        dumps=orjson.dumps,
+        loads=orjson.loads,
+    )
+)
+
+# Compact binary encoding, selected with CONTENT_TYPE=application/x-msgpack
+register_serializer(
+    Serializer(
+        name="msgpack",
+        content_type="application/x-msgpack",
+        content_encoding="binary",
+        dumps=msgpack.packb,
+        loads=msgpack.unpackb,
+    )
+)
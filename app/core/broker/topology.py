@@ -0,0 +1,102 @@
+import zlib
+
+from kombu import Exchange, Queue
+from kombu.common import maybe_declare
+
+from core.config import settings
+from core.enums import EventStoreTypeEnum, RoutingTypeEnum
+
+
+class BrokerTopology:
+    def __init__(self, partitions: int | None = None) -> None:
+        """
+        Single source of truth for the exchange/queue of every event store and
+        routing key.
+
+        With `partitions` (`BROKER_PARTITIONS`) above 1, every event store is
+        split into that many queues, each bound with its own routing key (e.g.
+        `signal.stream.p07` into `signal_stream_queue.p07`), and messages are
+        routed by a hash of their partition key. Messages sharing a key always
+        land in the same queue, in order.
+
+        kombu entities are built once and shared. Declaring them goes through
+        kombu's per-connection declaration cache, which is reset whenever a
+        connection is re-established, so each entity is declared once per
+        connection instead of once per message.
+        """
+        self.partitions = partitions or settings.BROKER_PARTITIONS
+        self._entities: dict[
+            tuple[str, str, int | None], tuple[Queue, Exchange]
+        ] = {}
+
+    def partition(self, partition_key: str | None) -> int | None:
+        """
+        Returns the partition of a partition key, None when not partitioned.
+
+        Messages without a key go to the first partition.
+        """
+        if self.partitions <= 1:
+            return None
+        if partition_key is None:
+            return 0
+        return zlib.crc32(partition_key.encode()) % self.partitions
+
+    def partition_range(self) -> list[int | None]:
+        """
+        Returns every partition of an event store.
+        """
+        if self.partitions <= 1:
+            return [None]
+        return list(range(self.partitions))
+
+    def queue_exchange(
+        self, event_store: str, routing_key: str, partition: int | None = None
+    ) -> tuple[Queue, Exchange]:
+        """
+        Returns the (cached) queue and exchange of an event store and routing key,
+        or of one of its partitions. Messages are published with the queue's
+        routing key.
+        """
+        entities = self._entities.get((event_store, routing_key, partition))
+        if entities is None:
+            suffix = "" if partition is None else f".p{partition:02d}"
+            exchange = Exchange(
+                f"{event_store}_exchange",
+                type=settings.EXCHANGE_TYPE,
+                durable=settings.DURABLE,
+            )
+            queue = Queue(
+                f"{event_store}_queue{suffix}",
+                exchange,
+                routing_key=f"{routing_key}{suffix}",
+                durable=settings.DURABLE,
+            )
+            entities = (queue, exchange)
+            self._entities[(event_store, routing_key, partition)] = entities
+        return entities
+
+    def declare(
+        self,
+        channel,
+        event_store: str,
+        routing_key: str,
+        partition: int | None = None,
+    ) -> tuple[Queue, Exchange]:
+        """
+        Declares the exchange, queue and binding on the channel's connection,
+        unless that connection already declared them.
+        """
+        queue, exchange = self.queue_exchange(event_store, routing_key, partition)
+        maybe_declare(queue, channel)
+        return queue, exchange
+
+    def declare_all(self, channel) -> None:
+        """
+        Declares the topology of every known event store and partition.
+        """
+        for event_store in EventStoreTypeEnum:
+            routing_key = RoutingTypeEnum[event_store.name]
+            for partition in self.partition_range():
+                self.declare(channel, event_store.value, routing_key.value, partition)
+
+topology = BrokerTopology()
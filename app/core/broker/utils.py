@@ -1,10 +1,10 @@
-from kombu import Queue, Exchange
+from kombu import Queue
+
+from core.broker.topology import topology
 
 
 class QueueExchangeUtil:
     @staticmethod
     def queue_exchange_formatting(event_store: str, routing_key: str) -> Queue:
-        exchange = f"{event_store}_exchange"
-        queue = f"{event_store}_queue"
-
-        return Queue(queue, Exchange(exchange), routing_key=routing_key)
+        queue, _ = topology.queue_exchange(event_store, routing_key)
+        return queue
@@ -0,0 +1,183 @@
+import logging
+import select
+import threading
+import time
+from collections import OrderedDict, defaultdict
+from collections.abc import Hashable
+from typing import Any
+
+import psycopg2
+from psycopg2.extensions import ISOLATION_LEVEL_AUTOCOMMIT
+
+from core.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+class TTLCache:
+    def __init__(self, name: str, maxsize: int, ttl: float) -> None:
+        """
+        Bounded, thread-safe in-process cache.
+
+        Entries expire `ttl` seconds after they were stored, and the least
+        recently used entry is evicted once the cache holds `maxsize` entries.
+        """
+        self.name = name
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._data: OrderedDict[Hashable, tuple[Any, float]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                self.misses += 1
+                return default
+
+            value, expires_at = entry
+            if expires_at <= time.monotonic():
+                del self._data[key]
+                self.misses += 1
+                return default
+
+            self._data.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def set(self, key: Hashable, value: Any, ttl: float | None = None) -> None:
+        with self._lock:
+            self._store(key, value, ttl)
+
+    def add(self, key: Hashable, value: Any, ttl: float | None = None) -> bool:
+        """
+        Stores the value unless the key holds a live entry, atomically.
+
+        Returns whether the value was stored. `ttl` overrides the cache TTL for
+        this entry, like in `set`.
+        """
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is not None and entry[1] > time.monotonic():
+                self._data.move_to_end(key)
+                self.hits += 1
+                return False
+
+            self.misses += 1
+            self._store(key, value, ttl)
+            return True
+
+    def invalidate(self, key: Hashable) -> None:
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+
+    def _store(self, key: Hashable, value: Any, ttl: float | None = None) -> None:
+        ttl = self.ttl if ttl is None else ttl
+        self._data[key] = (value, time.monotonic() + ttl)
+        self._data.move_to_end(key)
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+            self.evictions += 1
+
+    def stats(self) -> dict:
+        return {
+            "size": len(self._data),
+            "maxsize": self.maxsize,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+        }
+
+
+class CacheInvalidationListener:
+    def __init__(self, channel: str | None = None) -> None:
+        """
+        Clears registered caches on Postgres NOTIFY messages.
+
+        The notification payload is the name of the table whose rows changed,
+        as sent by the triggers of `core/cache_invalidation.sql`; an empty
+        payload clears every registered cache. Caches are also cleared after
+        every (re)connect, since notifications may have been missed.
+
+        Only started with CACHE_INVALIDATION_ENABLED, once those triggers are
+        installed; otherwise cached entries just expire after their TTL.
+        """
+        self.channel = channel or settings.CACHE_INVALIDATION_CHANNEL
+        self._caches: dict[str, list[TTLCache]] = defaultdict(list)
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+
+    def register(self, table: str, cache: TTLCache) -> None:
+        self._caches[table].append(cache)
+
+    def handle(self, payload: str) -> None:
+        table = payload.strip()
+        if table:
+            caches = self._caches.get(table, [])
+        else:
+            caches = [cache for caches in self._caches.values() for cache in caches]
+
+        for cache in caches:
+            cache.clear()
+
+    def start(self) -> None:
+        if self._thread is None:
+            self._stop.clear()
+            self._thread = threading.Thread(
+                target=self._listen, name="cache-invalidation", daemon=True
+            )
+            self._thread.start()
+
+    def stop(self) -> None:
+        if self._thread is not None:
+            self._stop.set()
+            self._thread.join()
+            self._thread = None
+
+    def _listen(self) -> None:
+        failing = False
+        while not self._stop.is_set():
+            connection = None
+            try:
+                connection = psycopg2.connect(
+                    host=settings.POSTGRES_HOST,
+                    port=settings.POSTGRES_PORT,
+                    user=settings.POSTGRES_USER,
+                    password=settings.POSTGRES_PASSWORD,
+                    dbname=settings.POSTGRES_DB,
+                )
+                connection.set_isolation_level(ISOLATION_LEVEL_AUTOCOMMIT)
+                with connection.cursor() as cursor:
+                    cursor.execute(f'LISTEN "{self.channel}"')
+                self.handle("")
+                if failing:
+                    logger.info("Cache invalidation listener reconnected")
+                    failing = False
+
+                while not self._stop.is_set():
+                    if select.select([connection], [], [], 1.0) == ([], [], []):
+                        continue
+                    connection.poll()
+                    while connection.notifies:
+                        self.handle(connection.notifies.pop(0).payload)
+            except psycopg2.Error as e:
+                # Log once until reconnected, not on every retry
+                if failing:
+                    logger.debug(f"Cache invalidation listener failed: {e}")
+                else:
+                    logger.error(f"Cache invalidation listener failed: {e}")
+                    failing = True
+                self._stop.wait(5)
+            finally:
+                if connection is not None:
+                    connection.close()
+
+
+cache_invalidation_listener = CacheInvalidationListener()
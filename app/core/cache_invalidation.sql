@@ -0,0 +1,29 @@
+-- Notifies the webhook workers when the rows behind their lookup cache change,
+-- so a deactivated bot or rotated secret stops authorizing right away instead
+-- of after LOOKUP_CACHE_TTL_SECONDS.
+--
+-- Run once against the service database, then set
+-- CACHE_INVALIDATION_ENABLED=True. The channel must match
+-- CACHE_INVALIDATION_CHANNEL.
+
+CREATE OR REPLACE FUNCTION notify_webhook_cache_invalidation() RETURNS trigger AS $$
+BEGIN
+    PERFORM pg_notify('webhook_cache_invalidation', TG_TABLE_NAME);
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS webhook_cache_invalidation ON webhook_secrets;
+CREATE TRIGGER webhook_cache_invalidation
+    AFTER INSERT OR UPDATE OR DELETE OR TRUNCATE ON webhook_secrets
+    FOR EACH STATEMENT EXECUTE FUNCTION notify_webhook_cache_invalidation();
+
+DROP TRIGGER IF EXISTS webhook_cache_invalidation ON bots;
+CREATE TRIGGER webhook_cache_invalidation
+    AFTER INSERT OR UPDATE OR DELETE OR TRUNCATE ON bots
+    FOR EACH STATEMENT EXECUTE FUNCTION notify_webhook_cache_invalidation();
+
+DROP TRIGGER IF EXISTS webhook_cache_invalidation ON channels;
+CREATE TRIGGER webhook_cache_invalidation
+    AFTER INSERT OR UPDATE OR DELETE OR TRUNCATE ON channels
+    FOR EACH STATEMENT EXECUTE FUNCTION notify_webhook_cache_invalidation();
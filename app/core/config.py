@@ -1,7 +1,5 @@
 import secrets
-import os
 from typing import Literal
-from dotenv import load_dotenv
 from pydantic_settings import BaseSettings, SettingsConfigDict
 from pydantic import (
     PostgresDsn,
@@ -9,7 +7,6 @@ from pydantic import (
 )
 from pydantic_core import MultiHostUrl
 
-load_dotenv(override=True, dotenv_path=".env")
 
 class Settings(BaseSettings):
     model_config = SettingsConfigDict(
@@ -20,6 +17,23 @@ class Settings(BaseSettings):
     ENVIRONMENT: Literal["local", "staging", "production"] = "local"
 
     API_V1_STR: str = "/api/v1"
+    SERVER_HOST: str = "0.0.0.0"
+    SERVER_PORT: int = 8000
+    WEB_CONCURRENCY: int | None = None
+    SERVER_GRACEFUL_TIMEOUT_SECONDS: int = 30
+    WEBHOOK_BATCH_MAX_ITEMS: int = 1000
+    DEDUP_ENABLED: bool = False
+    DEDUP_TTL_SECONDS: float = 300.0
+    DEDUP_PENDING_TTL_SECONDS: float = 30.0
+    DEDUP_MAXSIZE: int = 100_000
+    DEDUP_REDIS_URL: str | None = None
+    ADMISSION_ENABLED: bool = True
+    ADMISSION_MAX_CONCURRENCY: int = 64
+    ADMISSION_HIGH_WATERMARK: int = 256
+    ADMISSION_LOW_WATERMARK: int = 128
+    ADMISSION_RETRY_AFTER_SECONDS: int = 1
+    ADMIN_API_KEY: str | None = None
+    PROFILER_MAX_SECONDS: float = 60.0
     SECRET_KEY: str = secrets.token_urlsafe(32)
     ENCRYPTION_KEY: str = secrets.token_urlsafe(32)
     
@@ -29,6 +43,13 @@ class Settings(BaseSettings):
     POSTGRES_USER: str
     POSTGRES_PASSWORD: str = ""
     POSTGRES_DB: str = ""
+    LOOKUP_CACHE_MAXSIZE: int = 10_000
+    LOOKUP_CACHE_TTL_SECONDS: float = 60.0
+    LOOKUP_CACHE_WARM_UP: bool = True
+    CACHE_INVALIDATION_ENABLED: bool = False
+    CACHE_INVALIDATION_CHANNEL: str = "webhook_cache_invalidation"
+    HEALTH_PROBE_INTERVAL_SECONDS: float = 5.0
+    HEALTH_PROBE_TIMEOUT_SECONDS: float = 2.0
     
     BROKER_HOSTNAME: str
     BROKER_PORT: int
@@ -36,6 +57,24 @@ class Settings(BaseSettings):
     BROKER_PASSWORD: str
     VIRTUAL_HOST: str
     USE_SSL: bool = False
+    BROKER_POOL_LIMIT: int = 10
+    BROKER_POOL_TIMEOUT: float = 5.0
+    BROKER_MAX_RETRIES: int = 3
+    BROKER_PARTITIONS: int = 1
+    BROKER_COMPRESSION: str | None = None
+    BROKER_COMPRESSION_THRESHOLD: int = 1024
+    BROKER_BATCH_ENABLED: bool = False
+    BROKER_BATCH_MAX_SIZE: int = 100
+    BROKER_BATCH_LINGER_MS: int = 5
+    CONSUMER_PREFETCH_COUNT: int = 64
+    CONSUMER_WORKERS: int = 1
+    CONSUMER_MAX_RETRIES: int = 3
+    OUTBOX_ENABLED: bool = False
+    OUTBOX_DIR: str = "outbox"
+    OUTBOX_SEGMENT_BYTES: int = 16 * 1024 * 1024
+    OUTBOX_FSYNC_INTERVAL_MS: int = 0
+    OUTBOX_DRAIN_BATCH_SIZE: int = 500
+    OUTBOX_MAX_PUBLISH_ATTEMPTS: int = 5
     EXCHANGE_TYPE: str
     DURABLE: bool
     CONTENT_TYPE: str
@@ -55,6 +94,18 @@ class Settings(BaseSettings):
             path=self.POSTGRES_DB,
         )
 
+    @computed_field  # type: ignore[prop-decorator]
+    @property
+    def SQLALCHEMY_ASYNC_DATABASE_URI(self) -> PostgresDsn:
+        return MultiHostUrl.build(
+            scheme="postgresql+asyncpg",
+            username=self.POSTGRES_USER,
+            password=self.POSTGRES_PASSWORD,
+            host=self.POSTGRES_HOST,
+            port=self.POSTGRES_PORT,
+            path=self.POSTGRES_DB,
+        )
+
 
 
 settings = Settings()  # type: ignore
\ No newline at end of file
@@ -1,20 +1,50 @@
-from sqlmodel import Session, create_engine, select
+from sqlalchemy import Engine, text
+from sqlalchemy.ext.asyncio import AsyncEngine, create_async_engine
+from sqlmodel import Session, create_engine
 from core.config import settings
 
 
 class DatabaseClient:
     def __init__(self):
-        """Initialize the database engine and session maker."""
+        """
+        Holds the database engines, created on first use (or by `start` in the
+        app lifespan) instead of at import, so importing the app never touches
+        the database.
+        """
+        self.engine: Engine | None = None
+        self.async_engine: AsyncEngine | None = None
 
-        self.engine = create_engine(str(settings.SQLALCHEMY_DATABASE_URI))
-        
-        with Session(self.engine) as session:
-            self.Session = session
+    def start(self) -> None:
+        """Create the database engines up front."""
+        self.get_engine()
+        self.get_async_engine()
 
     def get_session(self):
         """Provide a new session."""
-        return self.Session()
+        return Session(self.get_engine())
 
-    def get_engine(self):
+    def get_engine(self) -> Engine:
         """Return the database engine."""
+        if self.engine is None:
+            self.engine = create_engine(str(settings.SQLALCHEMY_DATABASE_URI))
         return self.engine
+
+    def get_async_engine(self) -> AsyncEngine:
+        """Return the asyncio database engine."""
+        if self.async_engine is None:
+            self.async_engine = create_async_engine(
+                str(settings.SQLALCHEMY_ASYNC_DATABASE_URI)
+            )
+        return self.async_engine
+
+    async def ping(self) -> None:
+        """Run a trivial query on a pooled connection, raising if it fails."""
+        async with self.get_async_engine().connect() as connection:
+            await connection.execute(text("SELECT 1"))
+
+    async def close(self) -> None:
+        """Close every pooled connection of the engines."""
+        if self.async_engine is not None:
+            await self.async_engine.dispose()
+        if self.engine is not None:
+            self.engine.dispose()
@@ -0,0 +1,154 @@
+import hashlib
+import logging
+from collections.abc import Iterable
+
+from redis import asyncio as aioredis
+from redis.exceptions import RedisError
+
+from core.cache import TTLCache
+from core.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+# States of a claimed key: its signal is being published, or was published
+PENDING = "pending"
+DONE = "done"
+
+
+class SignalDeduplicator:
+    def __init__(
+        self,
+        ttl: float | None = None,
+        maxsize: int | None = None,
+        redis_url: str | None = None,
+        pending_ttl: float | None = None,
+    ) -> None:
+        """
+        Remembers the signals published during the last `ttl` seconds.
+
+        A key is claimed as PENDING while its signal is published, then marked
+        DONE once it was, or released if it failed, so only published signals
+        count as duplicates. A PENDING claim expires after `pending_ttl` seconds,
+        in case its worker died before completing or releasing it.
+
+        Keys live in a bounded in-process LRU+TTL cache, or in Redis (`SET NX PX`)
+        when `redis_url` is set, so every worker shares the same window. Redis
+        errors fail open: the signal is treated as new.
+        """
+        self.ttl = settings.DEDUP_TTL_SECONDS if ttl is None else ttl
+        self.pending_ttl = (
+            settings.DEDUP_PENDING_TTL_SECONDS if pending_ttl is None else pending_ttl
+        )
+        self.redis_url = redis_url or settings.DEDUP_REDIS_URL
+        self.checked = 0
+        self.duplicates = 0
+        self.in_flight = 0
+        self.errors = 0
+        self._cache = TTLCache(
+            name="signal_dedup",
+            maxsize=maxsize or settings.DEDUP_MAXSIZE,
+            ttl=self.ttl,
+        )
+        self._redis = aioredis.from_url(self.redis_url) if self.redis_url else None
+
+    @staticmethod
+    def make_key(*parts) -> str:
+        digest = hashlib.blake2b(
+            "\x1f".join(str(part) for part in parts).encode(), digest_size=16
+        )
+        return f"signals:dedup:{digest.hexdigest()}"
+
+    async def claim(self, key: str) -> str | None:
+        """
+        Claims the key as PENDING.
+
+        Returns None when it was claimed, otherwise the state of the existing
+        claim: PENDING while another request publishes the signal, DONE once
+        it was published.
+        """
+        self.checked += 1
+        if self._redis is None:
+            if self._cache.add(key, PENDING, ttl=self.pending_ttl):
+                return None
+            # An entry expiring right after `add` is still in flight at worst
+            state = self._cache.get(key, PENDING)
+        else:
+            try:
+                if await self._redis.set(
+                    key, PENDING, nx=True, px=int(self.pending_ttl * 1000)
+                ):
+                    return None
+                state = await self._redis.get(key)
+            except RedisError as e:
+                self.errors += 1
+                logger.error(f"Signal dedup claim failed: {e}")
+                return None
+            state = state.decode() if state is not None else PENDING
+
+        if state == DONE:
+            self.duplicates += 1
+        else:
+            self.in_flight += 1
+        return state
+
+    async def complete(self, keys: Iterable[str]) -> None:
+        """
+        Marks claimed keys DONE, once their signals were published, so their
+        retries are dropped for the rest of the window.
+        """
+        keys = list(keys)
+        if not keys:
+            return
+
+        if self._redis is None:
+            for key in keys:
+                self._cache.set(key, DONE)
+            return
+
+        try:
+            async with self._redis.pipeline(transaction=False) as pipe:
+                for key in keys:
+                    pipe.set(key, DONE, px=int(self.ttl * 1000))
+                await pipe.execute()
+        except RedisError as e:
+            self.errors += 1
+            logger.error(f"Signal dedup complete failed: {e}")
+
+    async def release(self, keys: Iterable[str]) -> None:
+        """
+        Forgets claimed keys, e.g. of signals that failed to be published, so
+        their retries go through.
+        """
+        keys = list(keys)
+        if not keys:
+            return
+
+        if self._redis is None:
+            for key in keys:
+                self._cache.invalidate(key)
+            return
+
+        try:
+            await self._redis.delete(*keys)
+        except RedisError as e:
+            self.errors += 1
+            logger.error(f"Signal dedup release failed: {e}")
+
+    async def close(self) -> None:
+        if self._redis is not None:
+            await self._redis.aclose()
+
+    def stats(self) -> dict:
+        return {
+            "backend": "redis" if self._redis is not None else "memory",
+            "checked": self.checked,
+            "duplicates": self.duplicates,
+            "duplicate_rate": round(self.duplicates / (self.checked or 1), 4),
+            "in_flight": self.in_flight,
+            "errors": self.errors,
+            "cache": self._cache.stats() if self._redis is None else None,
+        }
+
+
+signal_deduplicator = SignalDeduplicator()
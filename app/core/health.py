@@ -0,0 +1,142 @@
+import asyncio
+import logging
+import time
+from collections.abc import Awaitable, Callable
+from typing import NamedTuple
+
+from core.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+class ProbeResult(NamedTuple):
+    ok: bool
+    error: str | None
+    latency_ms: float
+    checked_at: float
+
+
+class HealthMonitor:
+    def __init__(
+        self, interval: float | None = None, timeout: float | None = None
+    ) -> None:
+        """
+        Probes the dependencies of the service (database, broker, ...) in the
+        background every `interval` seconds and caches the results, so health
+        routes answer from memory however often orchestrators poll them.
+
+        A probe taking longer than `timeout` seconds fails. Results older than
+        three intervals count as failed too, in case the probing itself stalls.
+        """
+        self.interval = interval or settings.HEALTH_PROBE_INTERVAL_SECONDS
+        self.timeout = timeout or settings.HEALTH_PROBE_TIMEOUT_SECONDS
+        self._probes: dict[str, Callable[[], Awaitable[None]]] = {}
+        self._results: dict[str, ProbeResult] = {}
+        self._task: asyncio.Task | None = None
+
+    def register(self, name: str, probe: Callable[[], Awaitable[None]]) -> None:
+        """
+        Adds a probe: a coroutine function raising when its dependency is down.
+        """
+        self._probes[name] = probe
+
+    @property
+    def is_running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    async def start(self) -> None:
+        """
+        Runs a first round of probes, which also warms up the connections they
+        use, then keeps probing in the background.
+        """
+        if self.is_running:
+            return
+        await self.probe_all()
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+
+    async def probe_all(self) -> None:
+        await asyncio.gather(
+            *(self._probe(name, probe) for name, probe in self._probes.items())
+        )
+
+    async def _run(self) -> None:
+        while True:
+            await asyncio.sleep(self.interval)
+            await self.probe_all()
+
+    async def _probe(self, name: str, probe: Callable[[], Awaitable[None]]) -> None:
+        started_at = time.perf_counter()
+        try:
+            await asyncio.wait_for(probe(), timeout=self.timeout)
+            error = None
+        except asyncio.TimeoutError:
+            error = f"timed out after {self.timeout}s"
+        except Exception as e:
+            error = str(e) or type(e).__name__
+
+        previous = self._results.get(name)
+        self._results[name] = ProbeResult(
+            ok=error is None,
+            error=error,
+            latency_ms=(time.perf_counter() - started_at) * 1000,
+            checked_at=time.monotonic(),
+        )
+        # Only log transitions, not every failed probe
+        if error is not None and (previous is None or previous.ok):
+            logger.error(f"Health probe {name} failed: {error}")
+        elif error is None and previous is not None and not previous.ok:
+            logger.info(f"Health probe {name} recovered")
+
+    def result(self, name: str) -> ProbeResult | None:
+        """
+        Returns the latest result of a probe, failed if it is stale.
+        """
+        result = self._results.get(name)
+        if result is None:
+            return None
+        if time.monotonic() - result.checked_at > 3 * self.interval:
+            return result._replace(ok=False, error="stale probe result")
+        return result
+
+    def is_alive(self) -> bool:
+        """
+        Whether the process is healthy, regardless of its dependencies: the
+        background probing has not died.
+        """
+        return self._task is None or not self._task.done() or self._task.cancelled()
+
+    def is_ready(self) -> bool:
+        """
+        Whether every dependency answered its latest probe.
+        """
+        results = [self.result(name) for name in self._probes]
+        return all(result is not None and result.ok for result in results)
+
+    def stats(self) -> dict:
+        now = time.monotonic()
+        stats = {}
+        for name in self._probes:
+            result = self.result(name)
+            if result is None:
+                stats[name] = {"ok": False, "error": "not probed yet"}
+                continue
+            stats[name] = {
+                "ok": result.ok,
+                "error": result.error,
+                "latency_ms": round(result.latency_ms, 3),
+                "age_seconds": round(now - result.checked_at, 3),
+            }
+        return stats
+
+
+health_monitor = HealthMonitor()
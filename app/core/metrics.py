@@ -0,0 +1,253 @@
+import math
+import os
+import threading
+import time
+from bisect import bisect_left
+from collections.abc import Callable, Iterable
+
+# Response header naming the worker process that served a per-worker endpoint
+WORKER_HEADER = "X-Worker-Pid"
+
+# Latency buckets in seconds, from sub-millisecond stages to slow requests
+DEFAULT_BUCKETS = (
+    0.0001,
+    0.00025,
+    0.0005,
+    0.001,
+    0.0025,
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1.0,
+    2.5,
+    5.0,
+    10.0,
+)
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(names: Iterable[str], values: Iterable[str]) -> str:
+    pairs = [f'{name}="{_escape(str(value))}"' for name, value in zip(names, values)]
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _format_value(value: float) -> str:
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    return repr(float(value))
+
+
+class Counter:
+    def __init__(
+        self, name: str, documentation: str, labelnames: tuple[str, ...] = ()
+    ) -> None:
+        """
+        Monotonic counter, one series per combination of label values.
+        """
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = labelnames
+        self._values: dict[tuple[str, ...], float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, *labelvalues: str, amount: float = 1.0) -> None:
+        with self._lock:
+            self._values[labelvalues] = self._values.get(labelvalues, 0.0) + amount
+
+    def total(self) -> float:
+        """
+        Returns the sum of every series.
+        """
+        with self._lock:
+            return sum(self._values.values())
+
+    def collect(self, const_labels: dict[str, str] | None = None) -> list[str]:
+        """
+        Returns the exposition lines, every series labelled with `const_labels`.
+        """
+        const_labels = const_labels or {}
+        with self._lock:
+            values = list(self._values.items())
+
+        lines = [
+            f"# HELP {self.name} {self.documentation}",
+            f"# TYPE {self.name} counter",
+        ]
+        names = (*const_labels, *self.labelnames)
+        for labelvalues, value in values:
+            labels = _format_labels(names, (*const_labels.values(), *labelvalues))
+            lines.append(f"{self.name}{labels} {_format_value(value)}")
+        return lines
+
+
+class Timer:
+    __slots__ = ("histogram", "labelvalues", "started_at")
+
+    def __init__(self, histogram: "Histogram", labelvalues: tuple[str, ...]) -> None:
+        self.histogram = histogram
+        self.labelvalues = labelvalues
+        self.started_at = 0.0
+
+    def __enter__(self) -> "Timer":
+        self.started_at = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        outcome = "ok" if exc_type is None else "error"
+        self.histogram.observe(
+            time.perf_counter() - self.started_at, *self.labelvalues, outcome
+        )
+
+
+class Histogram:
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: tuple[str, ...] = (),
+        buckets: tuple[float, ...] = DEFAULT_BUCKETS,
+    ) -> None:
+        """
+        Distribution of observed values over fixed buckets, one series per
+        combination of label values.
+
+        Observing is a bisect and three additions under an uncontended lock, so
+        it stays cheap on the hot path; cumulative bucket counts are only built
+        when the histogram is collected.
+        """
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = labelnames
+        self.buckets = tuple(sorted(buckets))
+        # label values -> [count per bucket (+Inf last), sum, count]
+        self._series: dict[tuple[str, ...], list] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, *labelvalues: str) -> None:
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(labelvalues)
+            if series is None:
+                series = self._series[labelvalues] = [
+                    [0] * (len(self.buckets) + 1),
+                    0.0,
+                    0,
+                ]
+            series[0][index] += 1
+            series[1] += value
+            series[2] += 1
+
+    def time(self, *labelvalues: str) -> Timer:
+        """
+        Times a block, observed with an `outcome` label value appended ("ok", or
+        "error" when the block raised), which must be the last label name.
+        """
+        return Timer(self, labelvalues)
+
+    def collect(self, const_labels: dict[str, str] | None = None) -> list[str]:
+        """
+        Returns the exposition lines, every series labelled with `const_labels`.
+        """
+        const_labels = const_labels or {}
+        with self._lock:
+            series = [
+                (labelvalues, list(counts), total, count)
+                for labelvalues, (counts, total, count) in self._series.items()
+            ]
+
+        lines = [
+            f"# HELP {self.name} {self.documentation}",
+            f"# TYPE {self.name} histogram",
+        ]
+        names = (*const_labels, *self.labelnames)
+        bucket_names = names + ("le",)
+        for labelvalues, counts, total, count in series:
+            labelvalues = (*const_labels.values(), *labelvalues)
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets + (math.inf,), counts):
+                cumulative += bucket_count
+                labels = _format_labels(
+                    bucket_names, labelvalues + (_format_value(bound),)
+                )
+                lines.append(f"{self.name}_bucket{labels} {cumulative}")
+            labels = _format_labels(names, labelvalues)
+            lines.append(f"{self.name}_sum{labels} {_format_value(total)}")
+            lines.append(f"{self.name}_count{labels} {count}")
+        return lines
+
+
+class MetricsRegistry:
+    def __init__(self, namespace: str = "signals") -> None:
+        """
+        Collects the registered metrics, plus gauges read from stats functions,
+        in the Prometheus text exposition format.
+
+        Every series carries a `worker` label with the process id: each server
+        worker keeps its own values and a scrape reaches any one of them, so
+        they must be told apart (and summed over `worker` in queries) instead
+        of appearing as one series that jumps and goes backwards.
+        """
+        self.namespace = namespace
+        self._metrics: list[Counter | Histogram] = []
+        self._stats: list[tuple[str, Callable[[], dict]]] = []
+
+    def counter(
+        self, name: str, documentation: str, labelnames: tuple[str, ...] = ()
+    ) -> Counter:
+        metric = Counter(f"{self.namespace}_{name}", documentation, labelnames)
+        self._metrics.append(metric)
+        return metric
+
+    def histogram(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: tuple[str, ...] = (),
+        buckets: tuple[float, ...] = DEFAULT_BUCKETS,
+    ) -> Histogram:
+        metric = Histogram(
+            f"{self.namespace}_{name}", documentation, labelnames, buckets
+        )
+        self._metrics.append(metric)
+        return metric
+
+    def register_stats(self, prefix: str, stats: Callable[[], dict]) -> None:
+        """
+        Exposes every number of a stats dict as a gauge named after its
+        (nested) keys, e.g. `signals_outbox_published` for the "published" key
+        of `{"outbox": {...}}` with an empty prefix.
+        """
+        self._stats.append((prefix, stats))
+
+    def render(self) -> str:
+        # Read on every render, workers may be forked after the registry exists
+        const_labels = {"worker": str(os.getpid())}
+        lines = []
+        for metric in self._metrics:
+            lines.extend(metric.collect(const_labels))
+        labels = _format_labels(const_labels, const_labels.values())
+        for prefix, stats in self._stats:
+            name = f"{self.namespace}_{prefix}" if prefix else self.namespace
+            self._render_stats(lines, name, stats(), labels)
+        return "\n".join(lines) + "\n"
+
+    def _render_stats(
+        self, lines: list[str], name: str, stats: dict, labels: str
+    ) -> None:
+        for key, value in stats.items():
+            gauge = f"{name}_{key}"
+            if isinstance(value, dict):
+                self._render_stats(lines, gauge, value, labels)
+            elif isinstance(value, (bool, int, float)):
+                lines.append(f"# TYPE {gauge} gauge")
+                lines.append(f"{gauge}{labels} {_format_value(value)}")
+
+
+registry = MetricsRegistry()
@@ -0,0 +1,213 @@
+import os
+import sys
+import threading
+import time
+from collections import Counter
+from collections.abc import Callable
+from types import CodeType, FrameType
+
+# Frames of files under the application directory are attributed to our modules
+APP_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__))) + os.sep
+
+
+class ProfilerBusyError(RuntimeError):
+    pass
+
+
+class Profile:
+    def __init__(self, interval: float) -> None:
+        """
+        Stacks sampled by a `SamplingProfiler` capture, counted per thread.
+        """
+        self.interval = interval
+        self.duration = 0.0
+        self.rounds = 0
+        self.requests = 0
+        # (thread name, outermost frame, ..., innermost frame) -> samples
+        self.stacks: Counter[tuple[str, ...]] = Counter()
+        # frame label -> our module it belongs to (None for library code)
+        self.modules: dict[str, str | None] = {}
+
+    def collapsed(self) -> str:
+        """
+        Returns the stacks in the collapsed format of flamegraph.pl and most
+        flame graph viewers: `thread;frame;...;frame count` lines.
+        """
+        return "".join(
+            f"{';'.join(stack)} {count}\n" for stack, count in self.stacks.items()
+        )
+
+    def speedscope(self) -> dict:
+        """
+        Returns the stacks as a speedscope file, one sampled profile per thread.
+        """
+        frames: dict[str, int] = {}
+        profiles: dict[str, dict] = {}
+        for (thread, *stack), count in self.stacks.items():
+            profile = profiles.setdefault(
+                thread,
+                {
+                    "type": "sampled",
+                    "name": thread,
+                    "unit": "seconds",
+                    "startValue": 0,
+                    "endValue": self.duration,
+                    "samples": [],
+                    "weights": [],
+                },
+            )
+            profile["samples"].append(
+                [frames.setdefault(label, len(frames)) for label in stack]
+            )
+            profile["weights"].append(count * self.interval)
+
+        return {
+            "$schema": "https://www.speedscope.app/file-format-schema.json",
+            "name": "signals profile",
+            "exporter": "signals",
+            "shared": {"frames": [{"name": label} for label in frames]},
+            "profiles": list(profiles.values()),
+        }
+
+    def summary(self, top: int = 20) -> dict:
+        """
+        Returns the samples attributed to our modules and the hottest frames.
+
+        A sample counts towards the `total` of every one of our modules on its
+        stack, and towards the `self` of the innermost one: time spent in
+        libraries is charged to the module of ours that called them.
+        Percentages are relative to the sampling rounds, i.e. to the wall time
+        of one thread.
+        """
+        module_self: Counter[str] = Counter()
+        module_total: Counter[str] = Counter()
+        frame_self: Counter[str] = Counter()
+        frame_total: Counter[str] = Counter()
+        for (_, *stack), count in self.stacks.items():
+            if not stack:
+                continue
+            frame_self[stack[-1]] += count
+            for label in set(stack):
+                frame_total[label] += count
+
+            modules = [self.modules[label] for label in stack if self.modules[label]]
+            if modules:
+                module_self[modules[-1]] += count
+                for module in set(modules):
+                    module_total[module] += count
+
+        rounds = max(self.rounds, 1)
+        return {
+            "duration_seconds": round(self.duration, 3),
+            "interval_ms": self.interval * 1000,
+            "rounds": self.rounds,
+            "requests": self.requests,
+            "modules": {
+                module: {
+                    "self": module_self[module],
+                    "total": total,
+                    "self_percent": round(100 * module_self[module] / rounds, 2),
+                    "total_percent": round(100 * total / rounds, 2),
+                }
+                for module, total in module_total.most_common()
+            },
+            "frames": [
+                {
+                    "frame": label,
+                    "self": count,
+                    "total": frame_total[label],
+                    "self_percent": round(100 * count / rounds, 2),
+                }
+                for label, count in frame_self.most_common(top)
+            ],
+        }
+
+
+class SamplingProfiler:
+    def __init__(self) -> None:
+        """
+        Samples the stacks of every thread of the live process, one capture at
+        a time.
+
+        Nothing runs between captures. During one, the capturing thread wakes
+        up every `interval` seconds and walks the current frame of every other
+        thread, which keeps the overhead low enough for production.
+        """
+        self._lock = threading.Lock()
+        self._labels: dict[CodeType, tuple[str, str | None]] = {}
+
+    @property
+    def is_running(self) -> bool:
+        return self._lock.locked()
+
+    def capture(
+        self,
+        seconds: float,
+        interval: float,
+        requests: int | None = None,
+        requests_total: Callable[[], float] | None = None,
+    ) -> Profile:
+        """
+        Samples the process for `seconds`, or until `requests` more requests
+        were counted by `requests_total` if that happens first. Blocks the
+        calling thread, which is not sampled itself.
+        """
+        if not self._lock.acquire(blocking=False):
+            raise ProfilerBusyError("A profile is already being captured.")
+
+        try:
+            profile = Profile(interval)
+            own_ident = threading.get_ident()
+            thread_names: dict[int, str] = {}
+            baseline = requests_total() if requests_total else 0
+
+            started_at = time.perf_counter()
+            deadline = started_at + seconds
+            while time.perf_counter() < deadline:
+                if requests_total is not None:
+                    profile.requests = int(requests_total() - baseline)
+                    if requests is not None and profile.requests >= requests:
+                        break
+
+                for ident, frame in sys._current_frames().items():
+                    if ident == own_ident:
+                        continue
+                    if ident not in thread_names:
+                        thread_names = {
+                            thread.ident: thread.name
+                            for thread in threading.enumerate()
+                        }
+                        thread_names.setdefault(ident, str(ident))
+                    thread = thread_names[ident]
+                    profile.stacks[(thread, *self._stack(frame, profile))] += 1
+                profile.rounds += 1
+                time.sleep(interval)
+
+            profile.duration = time.perf_counter() - started_at
+            return profile
+        finally:
+            self._lock.release()
+
+    def _stack(self, frame: FrameType | None, profile: Profile) -> list[str]:
+        stack = []
+        while frame is not None:
+            code = frame.f_code
+            label_module = self._labels.get(code)
+            if label_module is None:
+                label_module = self._labels[code] = self._label(frame)
+            label, module = label_module
+            profile.modules[label] = module
+            stack.append(label)
+            frame = frame.f_back
+        stack.reverse()
+        return stack
+
+    @staticmethod
+    def _label(frame: FrameType) -> tuple[str, str | None]:
+        code = frame.f_code
+        module = frame.f_globals.get("__name__") or os.path.basename(code.co_filename)
+        is_ours = code.co_filename.startswith(APP_ROOT)
+        return f"{module}:{code.co_qualname}", module if is_ours else None
+
+
+sampling_profiler = SamplingProfiler()
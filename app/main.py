@@ -1,10 +1,65 @@
+import asyncio
+import logging
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
+from sqlmodel.ext.asyncio.session import AsyncSession
 from core.config import settings
+from core.broker import (
+    outbox,
+    publisher_pool,
+    publish_batcher,
+    validate_serialization_settings,
+)
+from core.cache import cache_invalidation_listener
+from core.dedup import signal_deduplicator
+from core.health import health_monitor
+from api.deps import db_client
 from api.main import api_router
+from api.routes.webhooks import warm_authorization_cache
+
+logger = logging.getLogger(__name__)
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    validate_serialization_settings()
+    db_client.start()
+    await asyncio.to_thread(publisher_pool.start)
+    if settings.BROKER_BATCH_ENABLED:
+        publish_batcher.start()
+    if settings.OUTBOX_ENABLED:
+        outbox.start()
+    if settings.CACHE_INVALIDATION_ENABLED:
+        cache_invalidation_listener.start()
+    health_monitor.register("database", db_client.ping)
+    health_monitor.register("broker", publisher_pool.ping)
+    # The first probes also open a database connection before serving
+    await health_monitor.start()
+    if settings.LOOKUP_CACHE_WARM_UP:
+        await warm_lookup_caches()
+    yield
+    await health_monitor.stop()
+    cache_invalidation_listener.stop()
+    outbox.stop()
+    await publish_batcher.stop()
+    publisher_pool.close()
+    await signal_deduplicator.close()
+    await db_client.close()
+
+
+async def warm_lookup_caches() -> None:
+    try:
+        async with AsyncSession(db_client.get_async_engine()) as session:
+            count = await warm_authorization_cache(session)
+        logger.info(f"Warmed up the lookup cache with {count} authorizations")
+    except Exception as e:
+        logger.error(f"Failed to warm up the lookup cache: {e}")
+
 
 app = FastAPI(
     title=settings.PROJECT_NAME,
     openapi_url=f"{settings.API_V1_STR}/openapi.json",
+    lifespan=lifespan,
 )
 
 app.include_router(api_router, prefix=settings.API_V1_STR)
@@ -1,6 +1,6 @@
 from datetime import datetime, datetime
 from typing import Optional, Dict
-from sqlalchemy import Column
+from sqlalchemy import Column, Index
 from sqlmodel import SQLModel, Field, Relationship
 from sqlmodel import JSON
 
@@ -9,7 +9,7 @@ class WebHookSecret(SQLModel, table=True):
     __tablename__ = "webhook_secrets"
     id: int = Field(default=None, primary_key=True, index=True)
     bot_id: int = Field(default=None)
-    webhook_secret: str = Field(default="")
+    webhook_secret: str = Field(default="", index=True)
 
 
 class Bot(SQLModel, table=True):
@@ -23,6 +23,7 @@ class Bot(SQLModel, table=True):
 
 class Channel(SQLModel, table=True):
     __tablename__ = "channels"
+    __table_args__ = (Index("ix_channels_bot_id_name", "bot_id", "name"),)
     id: int = Field(default=None, primary_key=True, index=True)
     name: str = Field(max_length=255, nullable=False)
     is_predefined_indicator: bool = Field(default=False)
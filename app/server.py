@@ -0,0 +1,83 @@
+"""
+Production entry point: serves `main:app` from several worker processes on
+uvloop with the httptools HTTP parser.
+
+Every worker runs the app lifespan after it starts, so each one opens its own
+database and broker connections and warms its caches. SIGTERM/SIGINT stop the
+workers gracefully, finishing their in-flight requests for up to
+SERVER_GRACEFUL_TIMEOUT_SECONDS. SIGHUP restarts the workers one at a time
+(e.g. to pick up new settings) while the others keep serving; SIGTTIN and
+SIGTTOU add or remove a worker. Workers that die are replaced.
+
+Workers share nothing in memory, so some limits hold per worker:
+- the admission limits (ADMISSION_*), so the server admits WEB_CONCURRENCY
+  times as many requests;
+- the dedup window, unless DEDUP_REDIS_URL shares it; otherwise a retry
+  reaching another worker is not recognized as a duplicate;
+- the lookup caches, each warmed and invalidated on its own;
+- the metrics: every worker keeps its own counters and histograms and a
+  /metrics scrape reaches any one of them, so every series carries a `worker`
+  label (the pid) and queries aggregate over it, e.g.
+  `sum without (worker) (rate(signals_webhook_requests_total[5m]))`; a worker
+  that no scrape happened to reach shows gaps, and its series end on restart;
+- /Stats and /Profile, which report and sample only the worker that served
+  the request, named by their X-Worker-Pid header.
+The outbox is safe to share: every worker keeps its log in its own locked
+subdirectory of OUTBOX_DIR, and adopts the logs of workers that died.
+
+    python server.py
+"""
+
+import logging
+import math
+import os
+
+import uvicorn
+
+from core.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+def available_cpus() -> int:
+    """
+    Returns the CPUs this process may use: its CPU affinity, capped by the
+    cgroup (v2) CPU quota that container runtimes set for CPU limits.
+    """
+    try:
+        cpus = len(os.sched_getaffinity(0))
+    except AttributeError:
+        cpus = os.cpu_count() or 1
+
+    try:
+        with open("/sys/fs/cgroup/cpu.max") as f:
+            quota, period = f.read().split()
+        if quota != "max":
+            cpus = min(cpus, math.ceil(int(quota) / int(period)))
+    except (OSError, ValueError):
+        pass
+
+    return max(cpus, 1)
+
+
+def main() -> None:
+    workers = settings.WEB_CONCURRENCY or available_cpus()
+    if workers > 1 and settings.DEDUP_ENABLED and not settings.DEDUP_REDIS_URL:
+        logger.warning(
+            f"Each of the {workers} workers deduplicates signals on its own, "
+            "set DEDUP_REDIS_URL to share the dedup window"
+        )
+
+    uvicorn.run(
+        "main:app",
+        host=settings.SERVER_HOST,
+        port=settings.SERVER_PORT,
+        workers=workers,
+        loop="uvloop",
+        http="httptools",
+        timeout_graceful_shutdown=settings.SERVER_GRACEFUL_TIMEOUT_SECONDS,
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,119 @@
+"""
+Throughput benchmark of `BrokerClient.event_consumer` against the original
+one-message-at-a-time consumer, on kombu's in-memory transport.
+
+Every run publishes the same messages to a fresh queue and consumes them with a
+callback simulating some I/O, reporting messages per second.
+
+Run from the repository root:
+
+    python benchmarks/bench_consumer.py [messages] [callback_ms]
+"""
+
+import os
+import sys
+import threading
+import time
+
+os.environ.setdefault("PROJECT_NAME", "benchmark")
+os.environ.setdefault("POSTGRES_HOST", "localhost")
+os.environ.setdefault("POSTGRES_USER", "postgres")
+os.environ["BROKER_HOSTNAME"] = "memory://localhost"
+os.environ.setdefault("BROKER_PORT", "0")
+os.environ.setdefault("BROKER_USERNAME", "guest")
+os.environ.setdefault("BROKER_PASSWORD", "guest")
+os.environ.setdefault("VIRTUAL_HOST", "/")
+os.environ.setdefault("EXCHANGE_TYPE", "direct")
+os.environ.setdefault("DURABLE", "true")
+os.environ.setdefault("CONTENT_TYPE", "application/json")
+os.environ.setdefault("CONTENT_ENCODING", "utf-8")
+os.environ.setdefault("DELIVERY_MODE", "2")
+os.environ.setdefault("ACCEPT_CONTENT", "application/json")
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), os.pardir, "app"))
+
+from core.broker import AMQPClient  # noqa: E402
+from core.broker.topology import topology  # noqa: E402
+from core.config import settings  # noqa: E402
+
+MESSAGE = {
+    "tv_signal_id": "987654321_7",
+    "timestamp_utc": "2024-10-01 12:00:00",
+    "side": "buy",
+    "symbol": "BTCUSDT",
+    "entry_price": "64321.5",
+    "stop_loss_type": "percentage",
+    "stop_loss_value": "1.5",
+}
+
+
+def publish(event_store: str, count: int) -> None:
+    with AMQPClient() as client:
+        client.event_producer_batch(event_store, event_store, [MESSAGE] * count)
+
+
+def legacy_consume(client, event_store: str, callback, stop_event) -> None:
+    """
+    The original consumer: no QoS, callback and ack one message at a time.
+    """
+    queue, _ = topology.declare(
+        client.connection.default_channel, event_store, event_store
+    )
+
+    def _callback(body, message):
+        callback(body)
+        message.ack()
+
+    with client.connection.Consumer(
+        queue, callbacks=[_callback], accept=settings.ACCEPT_CONTENT.split()
+    ):
+        while not stop_event.is_set():
+            try:
+                client.connection.drain_events(timeout=0.05)
+            except TimeoutError:
+                pass
+
+
+def run(name: str, count: int, callback_ms: float, **options) -> None:
+    event_store = f"bench_{name}"
+    publish(event_store, count)
+
+    stop_event = threading.Event()
+    consumed = 0
+    lock = threading.Lock()
+
+    def callback(body):
+        nonlocal consumed
+        if callback_ms:
+            time.sleep(callback_ms / 1000)
+        with lock:
+            consumed += 1
+            if consumed == count:
+                stop_event.set()
+
+    started_at = time.perf_counter()
+    with AMQPClient() as client:
+        if options:
+            client.event_consumer(
+                event_store, event_store, callback, stop_event=stop_event, **options
+            )
+        else:
+            legacy_consume(client, event_store, callback, stop_event)
+    elapsed = time.perf_counter() - started_at
+
+    print(f"{name:<24} {count / elapsed:>12,.0f} msg/s  ({elapsed:.2f}s)")
+
+
+def main() -> None:
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 2_000
+    callback_ms = float(sys.argv[2]) if len(sys.argv) > 2 else 1.0
+
+    print(f"{count} messages, {callback_ms}ms callbacks")
+    run("legacy", count, callback_ms)
+    run("prefetch64_workers1", count, callback_ms, prefetch_count=64, workers=1)
+    run("prefetch64_workers8", count, callback_ms, prefetch_count=64, workers=8)
+    run("prefetch256_workers32", count, callback_ms, prefetch_count=256, workers=32)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,109 @@
+"""
+Micro-benchmark of `SignalEncryption.decrypt` against the original
+character-by-character implementation.
+
+Run from the repository root:
+
+    python benchmarks/bench_signal_encryption.py
+"""
+
+import base64
+import json
+import os
+import sys
+import timeit
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), os.pardir, "app"))
+
+from api.utils.signal_encryption import SignalEncryption  # noqa: E402
+
+BASE64_ALPHABET = "ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz0123456789+/"
+KEY = "x6q0nHn3zqQdUtMiV1X4f9mJkYyBv2PHcR8sQaLwE5o"
+
+
+def legacy_decrypt(ciphertext: str, key: str) -> str:
+    """The original implementation, kept as the reference."""
+    decrypted_base64 = ""
+    key_length = len(key)
+
+    ciphertext = base64.b64decode(ciphertext).decode()
+
+    for i, char in enumerate(ciphertext):
+        if char == "=":
+            decrypted_base64 += "="
+            continue
+
+        idx = BASE64_ALPHABET.find(char)
+        if idx == -1:
+            raise ValueError(f"Invalid Base64 character: {char}")
+
+        key_char = key[i % key_length] if key_length > 0 else ""
+        shift = ord(key_char) % 64 if key_char else 0
+
+        original_idx = (idx - shift) % 64
+        decrypted_base64 += BASE64_ALPHABET[original_idx]
+
+    padding_length = len(decrypted_base64) % 4
+    if padding_length:
+        decrypted_base64 += "=" * (4 - padding_length)
+
+    return base64.b64decode(decrypted_base64).decode("utf-8")
+
+
+def encrypt(message: str, key: str) -> str:
+    """Pine Script encryption, the inverse of `decrypt`."""
+    encoded = base64.b64encode(message.encode()).decode()
+    encrypted = "".join(
+        char
+        if char == "="
+        else BASE64_ALPHABET[
+            (BASE64_ALPHABET.index(char) + ord(key[i % len(key)]) % 64) % 64
+        ]
+        for i, char in enumerate(encoded)
+    )
+    return base64.b64encode(encrypted.encode()).decode()
+
+
+def make_signal(size: int) -> str:
+    signal = {
+        "tv_signal_id": "123456789",
+        "timestamp_utc": "2024-10-01 12:00:00",
+        "side": "buy",
+        "entry": "64321.5",
+        "sl": "1.5%",
+        "tp": "3%",
+        "description": "x" * size,
+    }
+    return json.dumps(signal)
+
+
+def main() -> None:
+    for size in (100, 1_000, 10_000, 100_000):
+        ciphertext = encrypt(make_signal(size), KEY)
+        assert SignalEncryption.decrypt(ciphertext, KEY) == legacy_decrypt(
+            ciphertext, KEY
+        )
+
+        number = max(1, 200_000 // (size + 100))
+        legacy = min(
+            timeit.repeat(
+                lambda: legacy_decrypt(ciphertext, KEY), number=number, repeat=5
+            )
+        )
+        current = min(
+            timeit.repeat(
+                lambda: SignalEncryption.decrypt(ciphertext, KEY),
+                number=number,
+                repeat=5,
+            )
+        )
+        print(
+            f"payload {len(ciphertext):>7} chars: "
+            f"legacy {legacy / number * 1e6:>10.1f} us  "
+            f"table-driven {current / number * 1e6:>8.1f} us  "
+            f"speedup {legacy / current:>6.1f}x"
+        )
+
+
+if __name__ == "__main__":
+    main()
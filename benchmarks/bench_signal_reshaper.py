@@ -0,0 +1,153 @@
+"""
+Benchmark of `SignalReshaper` against its implementation at a git ref, on
+realistic signals, checking that both produce byte-for-byte identical output.
+
+The baseline is read from git with the `api` package of the same ref, so its
+helpers are those of the ref too; the default compares uncommitted changes
+with HEAD. Run from the repository root:
+
+    python benchmarks/bench_signal_reshaper.py [--baseline-ref REF]
+"""
+
+import argparse
+import importlib
+import io
+import os
+import subprocess
+import sys
+import tarfile
+import tempfile
+import timeit
+
+import orjson
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir)
+
+sys.path.insert(0, os.path.join(ROOT, "app"))
+
+from api.utils.signal_reshaper import SignalReshaper  # noqa: E402
+
+
+def load_baseline(ref: str) -> type:
+    """
+    Imports `SignalReshaper` as of the git `ref`, leaving the current `api`
+    modules in place.
+    """
+    archive = subprocess.run(
+        ["git", "archive", ref, "app/api"], cwd=ROOT, check=True, capture_output=True
+    ).stdout
+
+    def is_api(name: str) -> bool:
+        return name == "api" or name.startswith("api.")
+
+    current = {name: module for name, module in sys.modules.items() if is_api(name)}
+    with tempfile.TemporaryDirectory() as directory:
+        with tarfile.open(fileobj=io.BytesIO(archive)) as tar:
+            tar.extractall(directory, filter="data")
+        for name in current:
+            del sys.modules[name]
+        sys.path.insert(0, os.path.join(directory, "app"))
+        try:
+            module = importlib.import_module("api.utils.signal_reshaper")
+        finally:
+            sys.path.pop(0)
+            for name in [name for name in sys.modules if is_api(name)]:
+                del sys.modules[name]
+            sys.modules.update(current)
+    return module.SignalReshaper
+
+
+STANDARD_BASE = {
+    "tv_signal_id": "987654321",
+    "timestamp_utc": "2024-10-01 12:00:00",
+    "description": "EMA cross",
+    "type": "strategy",
+    "bar_index_timestamp_utc": "2024-10-01 11:45:00",
+    "bar_index": 18342,
+    "order_type": "market",
+    "side": "long",
+    "symbol": "BINANCE:BTCUSDT",
+    "timeframe": "4h",
+}
+
+STANDARD_SIGNALS = {
+    "standard-entry": {
+        **STANDARD_BASE,
+        "event": "formed",
+        "entry_hit": "1",
+        "entry": "$64,321.50",
+        "sl": "1.5%",
+        **{f"tp{i}": f"{i * 0.75}%" for i in range(1, 9)},
+    },
+    "standard-entry-rr": {
+        **STANDARD_BASE,
+        "event": "formed",
+        "entry_hit": "1",
+        "entry": "64321.5",
+        "sl": "63000",
+        **{f"tp{i}": f"{i}rr" for i in range(1, 9)},
+    },
+    "standard-tp-hit": {
+        **STANDARD_BASE,
+        "event": "updated",
+        "tp6_hit": "1",
+        "sl": "63000",
+    },
+}
+
+CUSTOM_SIGNALS = {
+    "custom": {
+        "tv_signal_id": "abc-123",
+        "timestamp_utc": "2024-10-01 12:00:00",
+        "event": "open",
+        "side": "sell",
+        "entry": "2650.4",
+        "sl": "2%",
+        "tp": "3r",
+        "channel": "eth-scalps",
+    },
+}
+
+
+def bench(name: str, current, baseline) -> None:
+    assert orjson.dumps(current()) == orjson.dumps(baseline()), name
+
+    number = 20_000
+    baseline_time = min(timeit.repeat(baseline, number=number, repeat=5))
+    current_time = min(timeit.repeat(current, number=number, repeat=5))
+    print(
+        f"{name:<18} baseline {baseline_time / number * 1e6:>6.2f} us  "
+        f"current {current_time / number * 1e6:>6.2f} us  "
+        f"speedup {baseline_time / current_time:>5.2f}x"
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument(
+        "--baseline-ref",
+        default="HEAD",
+        help="git commit, branch or tag of the implementation to compare against",
+    )
+    args = parser.parse_args()
+    BaselineSignalReshaper = load_baseline(args.baseline_ref)
+
+    for name, signal in STANDARD_SIGNALS.items():
+        bench(
+            name,
+            lambda: SignalReshaper.reshape_standard_signal(signal, label_id=42),
+            lambda: BaselineSignalReshaper.reshape_standard_signal(
+                signal, label_id=42
+            ),
+        )
+
+    for name, signal in CUSTOM_SIGNALS.items():
+        bench(
+            name,
+            lambda: SignalReshaper.reshape_custom_signal(signal, "whsec"),
+            lambda: BaselineSignalReshaper.reshape_custom_signal(signal, "whsec"),
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,116 @@
+import asyncio
+import os
+import sys
+
+import httpx
+import pytest
+
+os.environ.setdefault("PROJECT_NAME", "tests")
+os.environ.setdefault("POSTGRES_HOST", "localhost")
+os.environ.setdefault("POSTGRES_USER", "postgres")
+os.environ["BROKER_HOSTNAME"] = "memory://localhost"
+os.environ.setdefault("BROKER_PORT", "0")
+os.environ.setdefault("BROKER_USERNAME", "guest")
+os.environ.setdefault("BROKER_PASSWORD", "guest")
+os.environ.setdefault("VIRTUAL_HOST", "/")
+os.environ.setdefault("EXCHANGE_TYPE", "direct")
+os.environ.setdefault("DURABLE", "true")
+os.environ.setdefault("CONTENT_TYPE", "application/json")
+os.environ.setdefault("CONTENT_ENCODING", "utf-8")
+os.environ.setdefault("DELIVERY_MODE", "2")
+os.environ.setdefault("ACCEPT_CONTENT", "application/json")
+os.environ["SECRET_KEY"] = "standard-secret"
+os.environ["ENCRYPTION_KEY"] = "encryption-key"
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), os.pardir, "app"))
+
+STANDARD_SECRET = "standard-secret"
+ENCRYPTION_KEY = "encryption-key"
+CUSTOM_SECRET = "custom-secret"
+ENCRYPTED_SECRET = "encrypted-secret"
+INACTIVE_SECRET = "inactive-secret"
+
+
+class WebhookApp:
+    def __init__(self, app, published: list[dict]) -> None:
+        self.app = app
+        self.published = published
+
+    def post(self, path: str, **kwargs) -> httpx.Response:
+        async def _post():
+            transport = httpx.ASGITransport(app=self.app)
+            async with httpx.AsyncClient(
+                transport=transport, base_url="http://test"
+            ) as client:
+                return await client.post(f"/api/v1/webhook{path}", **kwargs)
+
+        return asyncio.run(_post())
+
+    def post_concurrently(self, *requests: tuple[str, dict]) -> list[httpx.Response]:
+        """
+        Sends (path, kwargs) requests at once, e.g. a retry of an in-flight signal.
+        """
+
+        async def _post():
+            transport = httpx.ASGITransport(app=self.app)
+            async with httpx.AsyncClient(
+                transport=transport, base_url="http://test"
+            ) as client:
+                return await asyncio.gather(
+                    *(
+                        client.post(f"/api/v1/webhook{path}", **kwargs)
+                        for path, kwargs in requests
+                    )
+                )
+
+        return asyncio.run(_post())
+
+
+@pytest.fixture
+def webhook_app(tmp_path, monkeypatch) -> WebhookApp:
+    """
+    The app on a seeded SQLite database, with published signals captured
+    instead of sent to the broker.
+    """
+    from sqlalchemy.ext.asyncio import create_async_engine
+    from sqlmodel import Session, SQLModel, create_engine
+
+    import api.deps as deps
+    from api.routes import webhooks
+    from core.dedup import SignalDeduplicator
+    from main import app
+    from models import Bot, Channel, WebHookSecret
+
+    database = tmp_path / "signals.sqlite"
+    engine = create_engine(f"sqlite:///{database}")
+    SQLModel.metadata.create_all(engine)
+    with Session(engine) as session:
+        session.add(Bot(id=1, is_active=True))
+        session.add(Bot(id=2, is_active=True, is_signal_encrypted=True))
+        session.add(Bot(id=3, is_active=False))
+        session.add(WebHookSecret(id=1, bot_id=1, webhook_secret=CUSTOM_SECRET))
+        session.add(WebHookSecret(id=2, bot_id=2, webhook_secret=ENCRYPTED_SECRET))
+        session.add(WebHookSecret(id=3, bot_id=3, webhook_secret=INACTIVE_SECRET))
+        session.add(Channel(id=1, name="default", bot_id=1))
+        session.commit()
+
+    monkeypatch.setattr(deps.db_client, "engine", engine)
+    monkeypatch.setattr(
+        deps.db_client,
+        "async_engine",
+        create_async_engine(f"sqlite+aiosqlite:///{database}"),
+    )
+    webhooks.authorization_cache.clear()
+    monkeypatch.setattr(webhooks, "signal_deduplicator", SignalDeduplicator())
+
+    published = []
+
+    async def publish_signal(reshaped_signal):
+        published.append(reshaped_signal)
+
+    async def publish_signals(reshaped_signals):
+        published.extend(reshaped_signals)
+
+    monkeypatch.setattr(webhooks, "publish_signal", publish_signal)
+    monkeypatch.setattr(webhooks, "publish_signals", publish_signals)
+    return WebhookApp(app, published)
@@ -0,0 +1,40 @@
+import asyncio
+
+import httpx
+import pytest
+
+
+def post_profile(headers: dict) -> httpx.Response:
+    from main import app
+
+    async def _post():
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(
+            transport=transport, base_url="http://test"
+        ) as client:
+            return await client.post(
+                "/api/v1/Profile?seconds=1000000", headers=headers
+            )
+
+    return asyncio.run(_post())
+
+
+@pytest.fixture
+def admin_api_key(monkeypatch) -> str:
+    from core.config import settings
+
+    monkeypatch.setattr(settings, "ADMIN_API_KEY", "admin-key")
+    return settings.ADMIN_API_KEY
+
+
+@pytest.mark.parametrize(
+    "headers",
+    [{}, {"X-Admin-Key": "wrong"}, {"X-Admin-Key": "clé".encode()}],
+)
+def test_profile_requires_admin_key(admin_api_key, headers):
+    assert post_profile(headers).status_code == 403
+
+
+def test_profile_accepts_admin_key(admin_api_key):
+    # Past authorization, the capture is refused for its length
+    assert post_profile({"X-Admin-Key": admin_api_key}).status_code == 400
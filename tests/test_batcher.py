@@ -0,0 +1,77 @@
+import asyncio
+import time
+
+import pytest
+
+from core.broker.batcher import PublishBatcher
+
+
+@pytest.fixture
+def published(monkeypatch) -> list:
+    """
+    Messages published by batchers, in order; a message {"delay": s} takes
+    s seconds to publish.
+    """
+    published = []
+
+    def publish(groups):
+        for messages in groups.values():
+            time.sleep(max(message.get("delay", 0) for message in messages))
+            published.extend(messages)
+
+    monkeypatch.setattr(PublishBatcher, "_publish", staticmethod(publish))
+    return published
+
+
+def test_batches_of_a_queue_are_published_in_order(published):
+    async def run():
+        batcher = PublishBatcher(max_size=1, linger_ms=0)
+        batcher.start()
+        messages = [{"n": 0, "delay": 0.2}] + [{"n": n} for n in range(1, 5)]
+        await asyncio.gather(
+            *(batcher.submit("signal", "signal", message, 0) for message in messages)
+        )
+        await batcher.stop()
+
+    asyncio.run(run())
+
+    assert [message["n"] for message in published] == [0, 1, 2, 3, 4]
+
+
+def test_batches_of_other_queues_are_not_held_back(published):
+    async def run():
+        batcher = PublishBatcher(max_size=1, linger_ms=0)
+        batcher.start()
+        await asyncio.gather(
+            batcher.submit("signal", "signal", {"n": 0, "delay": 0.2}, 0),
+            batcher.submit("signal", "signal", {"n": 1}, 1),
+        )
+        await batcher.stop()
+
+    asyncio.run(run())
+
+    assert [message["n"] for message in published] == [1, 0]
+
+
+def test_submit_while_stopping(published):
+    async def run():
+        batcher = PublishBatcher(max_size=1, linger_ms=0)
+        batcher.start()
+        pending = asyncio.create_task(
+            batcher.submit("signal", "signal", {"n": 0, "delay": 0.1})
+        )
+        await asyncio.sleep(0.01)
+
+        stopping = asyncio.create_task(batcher.stop())
+        await asyncio.sleep(0.01)
+        assert not batcher.is_running
+        with pytest.raises(RuntimeError):
+            await batcher.submit("signal", "signal", {"n": 1})
+
+        await asyncio.wait_for(asyncio.gather(pending, stopping), timeout=5)
+        with pytest.raises(RuntimeError):
+            await batcher.submit("signal", "signal", {"n": 2})
+
+    asyncio.run(run())
+
+    assert published == [{"n": 0, "delay": 0.1}]
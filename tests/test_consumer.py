@@ -0,0 +1,80 @@
+import threading
+import time
+import uuid
+
+import pytest
+from kombu import Connection, Exchange, Queue
+
+from core.broker.consumer import ConcurrentConsumer
+
+
+def consume(callback, messages: list, max_retries: int, workers: int = 1):
+    """
+    Publishes the messages to a fresh in-memory queue and consumes it until
+    the callback has not been called for a while, returns what is left in it.
+    """
+    name = f"test-{uuid.uuid4().hex}"
+    exchange = Exchange(name, type="direct")
+    queue = Queue(name, exchange=exchange, routing_key=name)
+    calls = []
+
+    def _callback(body):
+        calls.append(time.monotonic())
+        callback(body)
+
+    with Connection("memory://") as connection:
+        with connection.Producer() as producer:
+            for message in messages:
+                producer.publish(
+                    message, exchange=exchange, routing_key=name, declare=[queue]
+                )
+
+        stop_event = threading.Event()
+        consumer = ConcurrentConsumer(
+            connection=connection,
+            queue=queue,
+            callback=_callback,
+            workers=workers,
+            stop_event=stop_event,
+            max_retries=max_retries,
+        )
+        thread = threading.Thread(target=consumer.run)
+        thread.start()
+        try:
+            idle_since = time.monotonic()
+            while time.monotonic() - max(calls[-1:] + [idle_since]) < 0.5:
+                time.sleep(0.05)
+        finally:
+            stop_event.set()
+            thread.join()
+        return queue(connection.default_channel).get()
+
+
+@pytest.mark.parametrize("workers", [1, 2])
+def test_failing_message_stops_being_redelivered(workers):
+    bodies = []
+
+    def callback(body):
+        bodies.append(body)
+        if body["n"] == 1:
+            raise ValueError("poison message")
+
+    leftover = consume(callback, [{"n": 1}, {"n": 2}], max_retries=2, workers=workers)
+
+    assert [body["n"] for body in bodies].count(1) == 3
+    assert [body["n"] for body in bodies].count(2) == 1
+    assert leftover is None
+
+
+def test_retried_message_succeeds(caplog):
+    attempts = []
+
+    def callback(body):
+        attempts.append(body)
+        if len(attempts) < 3:
+            raise ValueError("try again")
+
+    consume(callback, [{"n": 1}], max_retries=5)
+
+    assert attempts == [{"n": 1}] * 3
+    assert "Rejecting message" not in caplog.text
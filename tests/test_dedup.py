@@ -0,0 +1,147 @@
+import asyncio
+import json
+import time
+
+import pytest
+
+from conftest import CUSTOM_SECRET, ENCRYPTED_SECRET, ENCRYPTION_KEY, STANDARD_SECRET
+from test_webhook_json import ENCRYPTED_SIGNAL, STANDARD_SIGNAL, encrypt
+
+STANDARD_PATH = f"/signals?secret_key={STANDARD_SECRET}&label_id=7"
+STANDARD_BODY = {"content": (STANDARD_SIGNAL % "12").encode()}
+
+
+@pytest.fixture
+def dedup_enabled(monkeypatch):
+    from core.config import settings
+
+    monkeypatch.setattr(settings, "DEDUP_ENABLED", True)
+
+
+def test_claim_states():
+    from core.dedup import DONE, PENDING, SignalDeduplicator
+
+    async def claims():
+        deduplicator = SignalDeduplicator()
+        states = [await deduplicator.claim("a"), await deduplicator.claim("a")]
+        await deduplicator.complete(["a"])
+        states.append(await deduplicator.claim("a"))
+        await deduplicator.release(["a"])
+        states.append(await deduplicator.claim("a"))
+        return states, deduplicator.stats()
+
+    states, stats = asyncio.run(claims())
+
+    assert states == [None, PENDING, DONE, None]
+    assert (stats["duplicates"], stats["in_flight"]) == (1, 1)
+
+
+def test_pending_claim_expires():
+    from core.dedup import SignalDeduplicator
+
+    async def claims():
+        deduplicator = SignalDeduplicator(pending_ttl=0.05)
+        await deduplicator.claim("a")
+        time.sleep(0.1)
+        return await deduplicator.claim("a")
+
+    assert asyncio.run(claims()) is None
+
+
+def test_dedup_is_disabled_by_default(webhook_app):
+    for _ in range(2):
+        assert webhook_app.post(STANDARD_PATH, **STANDARD_BODY).status_code == 200
+
+    assert len(webhook_app.published) == 2
+
+
+def test_published_signal_is_a_duplicate(webhook_app, dedup_enabled):
+    first = webhook_app.post(STANDARD_PATH, **STANDARD_BODY)
+    retry = webhook_app.post(STANDARD_PATH, **STANDARD_BODY)
+
+    assert first.json()["message"] == "Signals saved successfully"
+    assert retry.json() == {"message": "Duplicate signal ignored", "data": None}
+    assert len(webhook_app.published) == 1
+
+
+def test_retry_of_in_flight_signal_survives_its_failure(
+    webhook_app, dedup_enabled, monkeypatch
+):
+    from api.routes import webhooks
+
+    async def publish_signal(reshaped_signal):
+        if not attempts:
+            attempts.append(reshaped_signal)
+            await asyncio.sleep(0.1)
+            raise ConnectionError("broker down")
+        webhook_app.published.append(reshaped_signal)
+
+    attempts = []
+    monkeypatch.setattr(webhooks, "publish_signal", publish_signal)
+    first, retry = webhook_app.post_concurrently(
+        (STANDARD_PATH, STANDARD_BODY), (STANDARD_PATH, STANDARD_BODY)
+    )
+    assert sorted([first.status_code, retry.status_code]) == [409, 500]
+
+    retry = webhook_app.post(STANDARD_PATH, **STANDARD_BODY)
+
+    assert retry.json()["message"] == "Signals saved successfully"
+    assert len(webhook_app.published) == 1
+
+
+def test_batch_reports_in_flight_duplicates(webhook_app, dedup_enabled):
+    signal = json.loads(STANDARD_SIGNAL % "12")
+    response = webhook_app.post(
+        f"/signals/batch?secret_key={STANDARD_SECRET}&label_id=7",
+        json=[signal, signal],
+    )
+    retry = webhook_app.post(
+        f"/signals/batch?secret_key={STANDARD_SECRET}&label_id=7", json=[signal]
+    )
+
+    assert [result["status"] for result in response.json()["results"]] == [
+        "published",
+        "error",
+    ]
+    assert response.json()["results"][1]["status_code"] == 409
+    assert retry.json()["duplicates"] == 1
+    assert len(webhook_app.published) == 1
+
+
+def test_identical_custom_alerts_are_not_duplicates(webhook_app, dedup_enabled):
+    body = {"side": "buy", "event": "open", "tv_signal_id": "1", "entry": "100.5"}
+    for _ in range(2):
+        response = webhook_app.post(
+            f"/signals?secret_key={CUSTOM_SECRET}&channel=default", json=body
+        )
+        assert response.json()["message"] == "Signals saved successfully"
+
+    first, second = webhook_app.published
+    assert first["tv_signal_id"] != second["tv_signal_id"]
+
+
+def test_identical_encrypted_alerts_without_id_are_not_duplicates(
+    webhook_app, dedup_enabled
+):
+    signal = {"side": "buy", "entry": "64321.5", "sl": "63000", "tp": "2"}
+    ciphertext = encrypt(json.dumps(signal), ENCRYPTION_KEY)
+    for _ in range(2):
+        response = webhook_app.post(
+            f"/signals?secret_key={ENCRYPTED_SECRET}", json={"data": ciphertext}
+        )
+        assert response.json()["message"] == "Signals saved successfully"
+
+    assert len(webhook_app.published) == 2
+
+
+def test_encrypted_retry_with_id_is_a_duplicate(webhook_app, dedup_enabled):
+    ciphertext = encrypt(ENCRYPTED_SIGNAL % "12", ENCRYPTION_KEY)
+    responses = [
+        webhook_app.post(
+            f"/signals?secret_key={ENCRYPTED_SECRET}", json={"data": ciphertext}
+        )
+        for _ in range(2)
+    ]
+
+    assert responses[1].json()["message"] == "Duplicate signal ignored"
+    assert len(webhook_app.published) == 1
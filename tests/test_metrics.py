@@ -0,0 +1,23 @@
+import os
+
+
+def test_every_series_is_labelled_with_its_worker():
+    from core.metrics import MetricsRegistry
+
+    registry = MetricsRegistry("test")
+    registry.counter("requests_total", "Requests.", ("outcome",)).inc("ok")
+    registry.histogram("seconds", "Latency.", buckets=(1.0,)).observe(0.5)
+    registry.register_stats("outbox", lambda: {"pending": 3})
+
+    worker = f'worker="{os.getpid()}"'
+    series = [
+        line for line in registry.render().splitlines() if not line.startswith("#")
+    ]
+    assert series == [
+        f'test_requests_total{{{worker},outcome="ok"}} 1.0',
+        f'test_seconds_bucket{{{worker},le="1.0"}} 1',
+        f'test_seconds_bucket{{{worker},le="+Inf"}} 1',
+        f"test_seconds_sum{{{worker}}} 0.5",
+        f"test_seconds_count{{{worker}}} 1",
+        f"test_outbox_pending{{{worker}}} 3.0",
+    ]
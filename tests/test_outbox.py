@@ -0,0 +1,243 @@
+import asyncio
+import os
+import sys
+import time
+
+import msgpack
+import orjson
+import pytest
+
+from core.broker.outbox import DEAD_LETTER_FILE, RECORD_HEADER, Outbox
+
+
+LOADS = {"application/json": orjson.loads, "application/x-msgpack": msgpack.unpackb}
+
+
+class FakeBroker:
+    def __init__(self) -> None:
+        self.available = True
+        self.messages = []
+
+    def publish(self, records: list[bytes]) -> None:
+        if not self.available:
+            raise ConnectionError("broker down")
+        messages = []
+        for record in records:
+            _, _, partition, content_type, _, message = record.split(b"\x00", 5)
+            int(partition or 0)
+            loads = LOADS[content_type.decode()]
+            messages.append(loads(message))
+        self.messages.extend(messages)
+
+
+@pytest.fixture
+def broker(monkeypatch) -> FakeBroker:
+    broker = FakeBroker()
+    monkeypatch.setattr(Outbox, "_publish", staticmethod(broker.publish))
+    return broker
+
+
+def new_outbox(directory, segment_bytes: int = 4096) -> Outbox:
+    # A single attempt: outages (ConnectionError) must still never dead-letter
+    outbox = Outbox(
+        directory=str(directory),
+        segment_bytes=segment_bytes,
+        fsync_interval_ms=0,
+        max_publish_attempts=1,
+    )
+    outbox.start()
+    return outbox
+
+
+def append(outbox: Outbox, *messages, partition=None) -> None:
+    asyncio.run(outbox.append_many("signal", "signal", list(messages), partition))
+
+
+def wait_for(predicate, timeout: float = 10.0) -> None:
+    deadline = time.monotonic() + timeout
+    while not predicate():
+        assert time.monotonic() < deadline, "timed out"
+        time.sleep(0.01)
+
+
+def log_directories(root) -> list[str]:
+    return sorted(
+        name
+        for name in os.listdir(root)
+        if not name.startswith(".") and os.path.isdir(os.path.join(root, name))
+    )
+
+
+def test_publishes_in_order_and_removes_drained_log(tmp_path, broker):
+    outbox = new_outbox(tmp_path)
+    append(outbox, {"n": 1}, {"n": 2})
+    append(outbox, {"n": 3})
+    wait_for(lambda: len(broker.messages) == 3)
+    outbox.stop()
+
+    assert broker.messages == [{"n": 1}, {"n": 2}, {"n": 3}]
+    assert log_directories(tmp_path) == []
+
+
+def test_replays_unpublished_messages_on_start(tmp_path, broker):
+    broker.available = False
+    outbox = new_outbox(tmp_path)
+    append(outbox, {"n": 1}, {"n": 2})
+    outbox.stop()
+    [left_behind] = log_directories(tmp_path)
+
+    broker.available = True
+    outbox = new_outbox(tmp_path)
+    wait_for(lambda: len(broker.messages) == 2)
+
+    assert broker.messages == [{"n": 1}, {"n": 2}]
+    assert outbox.stats()["adopted"] == 2
+    assert left_behind not in log_directories(tmp_path)
+    outbox.stop()
+
+
+def test_replay_stops_at_torn_record(tmp_path, broker):
+    broker.available = False
+    outbox = new_outbox(tmp_path)
+    append(outbox, {"n": 1}, {"n": 2})
+    outbox.stop()
+
+    [directory] = log_directories(tmp_path)
+    [segment] = [
+        os.path.join(tmp_path, directory, name)
+        for name in os.listdir(tmp_path / directory)
+        if name.endswith(".log")
+    ]
+    with open(segment, "r+b") as f:
+        length, _ = RECORD_HEADER.unpack(f.read(RECORD_HEADER.size))
+        # Corrupt the last byte of the second record, as a crash mid-write would
+        second_end = 2 * (RECORD_HEADER.size + length)
+        f.seek(second_end - 1)
+        f.write(b"\xff")
+
+    broker.available = True
+    outbox = new_outbox(tmp_path)
+    wait_for(lambda: len(broker.messages) == 1)
+    outbox.stop()
+
+    assert broker.messages == [{"n": 1}]
+
+
+def test_rolls_over_segments(tmp_path, broker):
+    broker.available = False
+    outbox = new_outbox(tmp_path, segment_bytes=256)
+    messages = [{"n": n, "padding": "x" * 64} for n in range(10)]
+    for message in messages:
+        append(outbox, message)
+
+    assert outbox.stats()["segments"] > 3
+
+    broker.available = True
+    wait_for(lambda: len(broker.messages) == len(messages))
+    wait_for(lambda: outbox.stats()["segments"] == 1)
+    outbox.stop()
+
+    assert broker.messages == messages
+
+
+def test_cursor_survives_restart(tmp_path, broker):
+    outbox = new_outbox(tmp_path)
+    append(outbox, {"n": 1}, {"n": 2})
+    wait_for(lambda: len(broker.messages) == 2)
+    broker.available = False
+    append(outbox, {"n": 3})
+    outbox.stop()
+
+    broker.available = True
+    outbox = new_outbox(tmp_path)
+    wait_for(lambda: len(broker.messages) == 3)
+    outbox.stop()
+
+    assert broker.messages == [{"n": 1}, {"n": 2}, {"n": 3}]
+
+
+def test_processes_keep_their_own_log(tmp_path, broker):
+    broker.available = False
+    first = new_outbox(tmp_path)
+    second = new_outbox(tmp_path)
+    append(first, {"n": 1})
+    append(second, {"n": 2})
+
+    assert first.directory != second.directory
+    assert second.stats()["adopted"] == 0
+
+    # Only the log of a stopped process is adopted, never one that is running
+    first.stop()
+    third = new_outbox(tmp_path)
+    assert third.stats()["adopted"] == 1
+    assert os.path.isdir(second.directory)
+
+    broker.available = True
+    wait_for(lambda: len(broker.messages) == 2)
+    second.stop()
+    third.stop()
+
+    assert sorted(message["n"] for message in broker.messages) == [1, 2]
+    assert log_directories(tmp_path) == []
+
+
+def test_bad_record_is_dead_lettered(tmp_path, broker):
+    outbox = new_outbox(tmp_path)
+    append(outbox, {"n": 1})
+    append(outbox, {"n": 2}, partition="not-a-partition")
+    append(outbox, {"n": 3})
+    wait_for(lambda: len(broker.messages) == 2)
+    outbox.stop()
+
+    assert broker.messages == [{"n": 1}, {"n": 3}]
+    assert outbox.stats()["dead_lettered"] == 1
+    with open(tmp_path / DEAD_LETTER_FILE, "rb") as f:
+        length, _ = RECORD_HEADER.unpack(f.read(RECORD_HEADER.size))
+        assert f.read(length).endswith(b'application/json\x00utf-8\x00{"n":2}')
+    assert log_directories(tmp_path) == []
+
+
+def test_new_segments_and_cursor_reach_the_disk(tmp_path, broker, monkeypatch):
+    # core.broker.outbox is the package attribute holding the Outbox singleton
+    outbox_module = sys.modules["core.broker.outbox"]
+    synced_directories = []
+    fsync_directory = outbox_module._fsync_directory
+
+    def record_fsync(directory):
+        synced_directories.append(directory)
+        fsync_directory(directory)
+
+    monkeypatch.setattr(outbox_module, "_fsync_directory", record_fsync)
+    broker.available = False
+    outbox = new_outbox(tmp_path, segment_bytes=256)
+    assert synced_directories == [str(tmp_path), outbox.directory]
+
+    # Acknowledged once the directory entry of its new segment is durable
+    append(outbox, {"padding": "x" * 150})
+    append(outbox, {"padding": "y" * 150})
+    assert synced_directories[2:] == [outbox.directory]
+
+    broker.available = True
+    wait_for(lambda: len(broker.messages) == 2)
+    wait_for(lambda: synced_directories.count(outbox.directory) > 2)
+    outbox.stop()
+
+
+def test_records_keep_the_content_type_they_were_written_with(
+    tmp_path, broker, monkeypatch
+):
+    from core.config import settings
+
+    broker.available = False
+    outbox = new_outbox(tmp_path)
+    append(outbox, {"n": 1})
+    monkeypatch.setattr(settings, "CONTENT_TYPE", "application/x-msgpack")
+    append(outbox, {"n": 2})
+    outbox.stop()
+
+    broker.available = True
+    outbox = new_outbox(tmp_path)
+    wait_for(lambda: len(broker.messages) == 2)
+    outbox.stop()
+
+    assert broker.messages == [{"n": 1}, {"n": 2}]
@@ -0,0 +1,64 @@
+import asyncio
+
+import pytest
+
+from core.broker.serializers import validate_serialization_settings
+from core.config import settings
+
+
+@pytest.mark.parametrize(
+    "name, value",
+    [("CONTENT_TYPE", "application/x-yaml"), ("BROKER_COMPRESSION", "zipp")],
+)
+def test_bad_serialization_setting_fails_start(monkeypatch, name, value):
+    from main import app
+
+    monkeypatch.setattr(settings, name, value)
+
+    async def start():
+        async with app.router.lifespan_context(app):
+            pass
+
+    with pytest.raises(ValueError, match=value):
+        asyncio.run(start())
+
+
+@pytest.mark.parametrize(
+    "content_type, compression",
+    [("application/json", None), ("application/x-msgpack", "zlib")],
+)
+def test_supported_serialization_settings(monkeypatch, content_type, compression):
+    monkeypatch.setattr(settings, "CONTENT_TYPE", content_type)
+    monkeypatch.setattr(settings, "BROKER_COMPRESSION", compression)
+
+    validate_serialization_settings()
+
+
+def test_str_messages_are_not_sent_as_binary_content():
+    from core.broker.serializers import encode_message, get_serializer
+
+    assert encode_message('{"n":1}', get_serializer("application/json")) == b'{"n":1}'
+    with pytest.raises(ValueError):
+        encode_message('{"n":1}', get_serializer("application/x-msgpack"))
+
+
+def test_encoded_messages_keep_their_content_type(monkeypatch):
+    from kombu import Connection
+
+    from core.broker.broker import BrokerClient
+    from core.broker.topology import topology
+
+    monkeypatch.setattr(settings, "CONTENT_TYPE", "application/x-msgpack")
+    with Connection("memory://") as connection:
+        BrokerClient(connection).event_producer_batch(
+            "serializers-test",
+            "serializers-test",
+            [b'{"n":1}'],
+            content_type="application/json",
+            content_encoding="utf-8",
+        )
+        queue, _ = topology.queue_exchange("serializers-test", "serializers-test")
+        message = queue(connection.default_channel).get()
+
+    assert message.content_type == "application/json"
+    assert message.decode() == {"n": 1}
@@ -0,0 +1,257 @@
+import pytest
+from fastapi import HTTPException
+
+STANDARD_BASE = {
+    "tv_signal_id": "987654321",
+    "timestamp_utc": "2024-10-01 12:00:00",
+    "description": "EMA cross",
+    "type": "strategy",
+    "bar_index_timestamp_utc": "2024-10-01 11:45:00",
+    "bar_index": 18342,
+    "order_type": "market",
+    "side": "long",
+    "symbol": "BINANCE:BTCUSDT",
+    "timeframe": "4h",
+}
+RESHAPED_BASE = {
+    "tv_signal_id": "987654321_42",
+    "timestamp_utc": "2024-10-01 12:00:00",
+    "meta_data": {
+        "description": "EMA cross",
+        "type": "strategy",
+        "bar_index_timestamp_utc": "2024-10-01 11:45:00",
+        "bar_index": 18342,
+    },
+    "order_type": 2,
+    "side": "buy",
+    "symbol": "BINANCE:BTCUSDT",
+    "timeframe": "240",
+}
+
+
+@pytest.mark.parametrize(
+    "signal, expected",
+    [
+        (
+            {
+                **STANDARD_BASE,
+                "event": "formed",
+                "entry_hit": "1",
+                "entry": "$64,321.50",
+                "sl": "1.5%",
+                **{f"tp{i}": f"{i * 0.75}%" for i in range(1, 9)},
+            },
+            {
+                **RESHAPED_BASE,
+                "event": "open",
+                "hit": "ENTRY",
+                "strategy": 42,
+                "entry_price": "64321.5",
+                "stop_loss_type": "percentage",
+                "stop_loss_value": "1.5",
+                "take_profit_type": "percentage",
+                "take_profit_values": [
+                    "0.75",
+                    "1.5",
+                    "2.25",
+                    "3.0",
+                    "3.75",
+                    "4.5",
+                    "5.25",
+                    "6.0",
+                ],
+            },
+        ),
+        (
+            {
+                **STANDARD_BASE,
+                "event": "formed",
+                "entry_hit": "1",
+                "entry": "64321.5",
+                "sl": "63000",
+                **{f"tp{i}": f"{i}rr" for i in range(1, 9)},
+            },
+            {
+                **RESHAPED_BASE,
+                "event": "open",
+                "hit": "ENTRY",
+                "strategy": 42,
+                "entry_price": "64321.5",
+                "stop_loss_type": "currency",
+                "stop_loss_value": "63000.0",
+                "take_profit_type": "risk_reward",
+                "take_profit_values": [f"{i}.0" for i in range(1, 9)],
+            },
+        ),
+        (
+            {**STANDARD_BASE, "event": "updated", "tp6_hit": "1", "sl": "63000"},
+            {
+                **RESHAPED_BASE,
+                "event": "update",
+                "hit": "TP6",
+                "strategy": 42,
+                "entry_price": "0.0",
+                "stop_loss_type": "currency",
+                "stop_loss_value": "63000.0",
+                "take_profit_type": "NaN",
+                "take_profit_values": ["NaN"],
+            },
+        ),
+    ],
+)
+def test_reshape_standard_signal(signal, expected):
+    from api.utils.signal_reshaper import SignalReshaper
+
+    reshaped = SignalReshaper.reshape_standard_signal(signal, label_id=42)
+
+    # Compared as lists to pin the key order of the published JSON too
+    assert list(reshaped.items()) == list(expected.items())
+
+
+def test_reshape_custom_signal():
+    from api.utils.signal_reshaper import SignalReshaper
+
+    signal = {
+        "tv_signal_id": "abc-123",
+        "timestamp_utc": "2024-10-01 12:00:00",
+        "event": "open",
+        "side": "sell",
+        "entry": "2650.4",
+        "sl": "2%",
+        "tp": "3r",
+        "channel": "eth-scalps",
+    }
+
+    reshaped = SignalReshaper.reshape_custom_signal(signal, "whsec")
+
+    assert list(reshaped.items()) == [
+        ("tv_signal_id", "abc-123"),
+        ("timestamp_utc", "2024-10-01 12:00:00"),
+        ("webhook_secret", "whsec"),
+        ("event", "open"),
+        ("order_type", 2),
+        ("side", "sell"),
+        ("entry_price", "2650.4"),
+        ("channel", "eth-scalps"),
+        ("stop_loss_type", "percentage"),
+        ("stop_loss_value", "2.0"),
+        ("take_profit_type", "risk_reward"),
+        ("take_profit_values", ["3.0"]),
+    ]
+
+
+@pytest.mark.parametrize(
+    "event, expected",
+    [
+        (None, "open"),
+        ("open", "open"),
+        ("Formed", "open"),
+        ("update", "update"),
+        ("UPDATED", "update"),
+        ("close", "close"),
+        ("invalidated", "close"),
+        ("close-all", "close-all"),
+        ("close_all", "close-all"),
+        ("Close All", "close-all"),
+    ],
+)
+def test_event_checker(event, expected):
+    from api.utils.signal_reshaper import SignalReshaper
+
+    assert SignalReshaper.event_checker(event) == expected
+
+
+@pytest.mark.parametrize(
+    "side, expected",
+    [("buy", "buy"), ("Long", "buy"), ("SELL", "sell"), ("short", "sell")],
+)
+def test_side_checker(side, expected):
+    from api.utils.signal_reshaper import SignalReshaper
+
+    assert SignalReshaper.side_checker(side) == expected
+
+
+@pytest.mark.parametrize(
+    "checker, value, detail",
+    [
+        ("event_checker", "closed", None),
+        ("side_checker", None, "Side is required"),
+        ("side_checker", "flat", "Invalid side"),
+        ("format_stop_loss_price", "2r", None),
+        ("format_take_profit_prices", ["1%", "2", *["3%"] * 6], None),
+        ("format_take_profit_prices", ["1%", None, *["3%"] * 6], None),
+    ],
+)
+def test_checkers_reject_invalid_values(checker, value, detail):
+    from api.utils.signal_reshaper import SignalReshaper
+
+    with pytest.raises(HTTPException) as excinfo:
+        getattr(SignalReshaper, checker)(value)
+
+    assert excinfo.value.status_code == 400
+    if detail is not None:
+        assert excinfo.value.detail == detail
+
+
+@pytest.mark.parametrize(
+    "signal, expected",
+    [
+        ({"entry_hit": "8", "sl_hit": "1"}, "ENTRY"),
+        ({"entry_hit": "9", "sl_hit": "1"}, "SL"),
+        ({"tp1_hit": "1", "tp2_hit": "1"}, "TP1"),
+        ({"tp8_hit": "1"}, "TP8"),
+        ({"tp3_hit": "0"}, None),
+    ],
+)
+def test_format_hit_field(signal, expected):
+    from api.utils.signal_reshaper import SignalReshaper
+
+    assert SignalReshaper.format_hit_field(signal) == expected
+
+
+@pytest.mark.parametrize(
+    "timeframe, expected",
+    [
+        ("5", 5),
+        ("45", 45),
+        ("h", 60),
+        ("2H", 120),
+        ("4 h", 240),
+        ("12h", 720),
+        ("D", 1440),
+        ("3d", 4320),
+        ("W", 10080),
+        ("m", 43200),
+        ("43200", 43200),
+    ],
+)
+def test_convert_to_minutes(timeframe, expected):
+    from api.utils import convert_to_minutes
+
+    assert convert_to_minutes(timeframe) == expected
+
+
+def test_convert_to_minutes_rejects_unknown_timeframes():
+    from api.utils import convert_to_minutes
+
+    with pytest.raises(ValueError, match="Invalid timeframe: 1M"):
+        convert_to_minutes("1m")
+
+
+@pytest.mark.parametrize(
+    "price, expected",
+    [("$64,321.50", "64321.5"), ("-1.5", "-1.5"), (" 63 000 ", "63000.0")],
+)
+def test_clean_price_string(price, expected):
+    from api.utils import clean_price_string
+
+    # Twice, the second answer comes from the cache
+    assert clean_price_string(price) == expected
+    assert clean_price_string(price) == expected
+
+
+def test_clean_price_string_rejects_non_prices():
+    from api.utils import clean_price_string
+
+    with pytest.raises(ValueError, match="Unable to parse 'abc' as a float."):
+        clean_price_string("abc")
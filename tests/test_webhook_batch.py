@@ -0,0 +1,43 @@
+import pytest
+
+from conftest import CUSTOM_SECRET, INACTIVE_SECRET
+
+SIGNAL = {"side": "buy", "event": "open", "entry": "100.5", "sl": "99", "tp": "2"}
+
+
+@pytest.mark.parametrize("secret_key", ["unknown-secret", INACTIVE_SECRET])
+@pytest.mark.parametrize(
+    "body",
+    [
+        {"json": []},
+        {"json": [1, 2]},
+        {"json": [SIGNAL, SIGNAL]},
+        {"content": b"buy BTC sl=1 tp: 3 entry=2\nsell BTC sl=1 tp: 3 entry=2"},
+    ],
+)
+def test_batch_with_bad_secret_is_forbidden(webhook_app, secret_key, body):
+    response = webhook_app.post(f"/signals/batch?secret_key={secret_key}", **body)
+
+    assert response.status_code == 403, response.text
+    assert webhook_app.published == []
+
+
+def test_batch_reports_item_errors_for_a_valid_secret(webhook_app):
+    response = webhook_app.post(
+        f"/signals/batch?secret_key={CUSTOM_SECRET}&channel=default",
+        json=[SIGNAL, 1],
+    )
+
+    assert response.status_code == 200, response.text
+    assert response.json()["published"] == 1
+    assert response.json()["results"][1]["status_code"] == 400
+    assert len(webhook_app.published) == 1
+
+
+def test_empty_batch_with_valid_secret(webhook_app):
+    response = webhook_app.post(
+        f"/signals/batch?secret_key={CUSTOM_SECRET}", json=[]
+    )
+
+    assert response.status_code == 200, response.text
+    assert response.json()["published"] == 0
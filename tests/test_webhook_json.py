@@ -0,0 +1,113 @@
+import base64
+import json
+
+import pytest
+
+from conftest import (
+    CUSTOM_SECRET,
+    ENCRYPTED_SECRET,
+    ENCRYPTION_KEY,
+    STANDARD_SECRET,
+)
+
+BOM = b"\xef\xbb\xbf"
+BASE64_ALPHABET = "ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz0123456789+/"
+
+STANDARD_SIGNAL = (
+    '{"tv_signal_id": "987654321", "timestamp_utc": "2024-10-01 12:00:00",'
+    ' "description": "Long", "type": "entry",'
+    ' "bar_index_timestamp_utc": "2024-10-01 12:00:00", "bar_index": %s,'
+    ' "side": "buy", "symbol": "BTCUSDT", "timeframe": "60", "event": "open",'
+    ' "entry_hit": "1", "entry": "64321.5", "sl": "63000", "tp1": "65000",'
+    ' "tp2": "66000", "tp3": "67000", "tp4": "68000", "tp5": "69000",'
+    ' "tp6": "70000", "tp7": "71000", "tp8": "72000"}'
+)
+CUSTOM_SIGNAL = (
+    '{"side": "buy", "event": "open", "entry": "64321.5", "sl": "63000",'
+    ' "tp": "2", "rsi": %s}'
+)
+ENCRYPTED_SIGNAL = (
+    '{"tv_signal_id": "E1", "timestamp_utc": "2024-10-01 12:00:00",'
+    ' "side": "buy", "entry": "64321.5", "sl": "63000", "tp": "2", "rsi": %s}'
+)
+
+
+def encrypt(message: str, key: str) -> str:
+    """
+    Encrypts like the Pine Script counterpart of `SignalEncryption.decrypt`.
+    """
+    shifted = [
+        char
+        if char == "="
+        else BASE64_ALPHABET[
+            (BASE64_ALPHABET.index(char) + ord(key[index % len(key)])) % 64
+        ]
+        for index, char in enumerate(base64.b64encode(message.encode()).decode())
+    ]
+    return base64.b64encode("".join(shifted).encode()).decode()
+
+
+def without_generated_fields(signal: dict) -> dict:
+    return {
+        key: value
+        for key, value in signal.items()
+        if key not in ("tv_signal_id", "timestamp_utc")
+    }
+
+
+def test_payload_accepts_nan_and_bom():
+    from api.utils.webhook_payload import WebhookPayload
+
+    payload = WebhookPayload(BOM + b'{"rsi": NaN, "atr": Infinity}')
+
+    assert payload.data == {"rsi": None, "atr": None}
+
+
+def test_payload_keeps_text_alerts_as_text():
+    from api.utils.webhook_payload import WebhookPayload
+
+    assert not WebhookPayload(b"buy BTC sl=1 tp: 3 entry=2").is_json
+
+
+@pytest.mark.parametrize("body", [STANDARD_SIGNAL % "NaN", STANDARD_SIGNAL % "12"])
+@pytest.mark.parametrize("bom", [b"", BOM])
+def test_standard_signal_with_nan_or_bom(webhook_app, body, bom):
+    response = webhook_app.post(
+        f"/signals?secret_key={STANDARD_SECRET}&label_id=7",
+        content=bom + body.encode(),
+        headers={"Content-Type": "application/json"},
+    )
+
+    assert response.status_code == 200, response.text
+    [signal] = webhook_app.published
+    assert signal["tv_signal_id"] == "987654321_7"
+    assert signal["entry_price"] == json.loads(body)["entry"]
+    assert response.json()["data"] == signal
+
+
+@pytest.mark.parametrize("bom", [b"", BOM])
+def test_custom_signal_with_nan_or_bom_is_read_as_json(webhook_app, bom):
+    for value in ("12", "NaN"):
+        response = webhook_app.post(
+            f"/signals?secret_key={CUSTOM_SECRET}&channel=default",
+            content=bom + (CUSTOM_SIGNAL % value).encode(),
+            headers={"Content-Type": "application/json"},
+        )
+        assert response.status_code == 200, response.text
+
+    plain, with_nan = webhook_app.published
+    assert without_generated_fields(with_nan) == without_generated_fields(plain)
+
+
+@pytest.mark.parametrize("bom", ["", "\ufeff"])
+def test_encrypted_signal_with_nan_or_bom(webhook_app, bom):
+    for value in ("12", "NaN"):
+        ciphertext = encrypt(bom + ENCRYPTED_SIGNAL % value, ENCRYPTION_KEY)
+        response = webhook_app.post(
+            f"/signals?secret_key={ENCRYPTED_SECRET}", json={"data": ciphertext}
+        )
+        assert response.status_code == 200, response.text
+
+    plain, with_nan = webhook_app.published
+    assert with_nan["tv_signal_id"] == "E1"
+    assert with_nan == plain